@@ -25,4 +25,14 @@ DEDUPLICATION_COLUMN_DEFINITIONS = {
     "secondary_title": ["secondary_title", "secondary title", "secondary-title"],
 }
 
+# Indexing methods used for the blocking keys of deduplication methods
+INDEXING_METHODS = ["block", "minhash", "sortedneighbourhood"]
+
+# Policies for blocks larger than the maximum block size while indexing
+BLOCK_POLICIES = ["keep", "skip", "split", "subblock"]
+
+# Engines for cleaning columns of the dataset, either calling the cleaning
+# function for every value or using vectorised pandas string operations
+CLEAN_ENGINES = ["python", "vectorised"]
+
 OPENALEX_QUERY_LIMIT = 25
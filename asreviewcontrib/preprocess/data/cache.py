@@ -0,0 +1,239 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+# Version of the cached datasets, changed when loading or standardising
+# datasets changes so that older entries are not used anymore
+CACHE_VERSION = 1
+# Maximum total size of the cached datasets in bytes
+DEFAULT_CACHE_SIZE = 1024**3
+ENTRY_SUFFIXES = (".feather", ".pkl")
+
+
+def _hash_file(fp, block_size=1024**2):
+    """Hash the content of a file together with the cache version"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"asreview-preprocess-cache-{CACHE_VERSION}".encode())
+    with open(fp, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _stat_id(fp):
+    """Path, size and modification time of a file"""
+    stat = os.stat(fp)
+    return f"{os.path.abspath(fp)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _is_current(stat_id):
+    """Check if a file still has the path, size and modification time"""
+    path = stat_id.rsplit(":", 2)[0]
+    try:
+        return _stat_id(path) == stat_id
+    except OSError:
+        return False
+
+
+class DatasetCache:
+    """Cache of standardised datasets and their column specification keyed
+    by the fingerprint of the input file
+
+    Entries are keyed by the size and content hash of the input file. The
+    content hash is remembered for the path, size and modification time of
+    the file, so unchanged files are not read again. Datasets are stored in
+    uncompressed Feather files which are read memory-mapped if pyarrow is
+    installed, otherwise (or if a dataset can not be converted to Arrow) in
+    pickle files. Least recently used entries are evicted when the total
+    size of the entries exceeds `max_size`.
+
+    Parameters
+    ----------
+    cache_dir : str, pathlib.Path
+        Directory of the cache, created if it does not exist
+    max_size : int, optional
+        Maximum total size of the cached datasets in bytes,
+        by default DEFAULT_CACHE_SIZE (1 GiB)
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = str(cache_dir)
+        self.max_size = max_size
+
+    def fingerprint(self, fp):
+        """Get the cache key of a file from its size and content hash,
+        hashing the content only if the file changed since it was cached"""
+        stat_id = _stat_id(fp)
+        stat_key = hashlib.blake2b(stat_id.encode(), digest_size=16).hexdigest()
+        stat_path = os.path.join(self.cache_dir, f"{stat_key}.key")
+        try:
+            with open(stat_path) as f:
+                return f.readline().strip()
+        except OSError:
+            pass
+
+        key = f"{os.path.getsize(fp):x}-{_hash_file(fp)}"
+        self._write_atomic(
+            stat_path, lambda path: _write_text(path, f"{key}\n{stat_id}\n")
+        )
+        return key
+
+    def get(self, fp):
+        """Get the cached dataset and column specification of a file
+
+        Returns
+        -------
+        tuple
+            tuple of dataset and column specification, None if the file is
+            not in the cache
+        """
+        key = self.fingerprint(fp)
+        for suffix in ENTRY_SUFFIXES:
+            entry_path = os.path.join(self.cache_dir, key + suffix)
+            if not os.path.isfile(entry_path):
+                continue
+            try:
+                if suffix == ".feather":
+                    df, col_specs = self._read_feather(entry_path)
+                else:
+                    cached = pd.read_pickle(entry_path)
+                    df, col_specs = cached["df"], cached["col_specs"]
+            except Exception:
+                logging.warning(f"Removing unreadable cache entry {entry_path}")
+                _remove(entry_path)
+                continue
+
+            # Mark entry as recently used for eviction
+            os.utime(entry_path)
+            logging.info(f"Loaded {fp} from cache entry {entry_path}")
+            return df, col_specs
+
+        return None
+
+    def put(self, fp, df, col_specs):
+        """Add the dataset and column specification of a file to the cache
+        and evict least recently used entries if the cache is too large"""
+        key = self.fingerprint(fp)
+        entry_path = None
+        if pa is not None:
+            try:
+                table = self._to_arrow(df, col_specs)
+                entry_path = os.path.join(self.cache_dir, key + ".feather")
+                self._write_atomic(
+                    entry_path,
+                    lambda path: feather.write_feather(
+                        table, path, compression="uncompressed"
+                    ),
+                )
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                entry_path = None
+        if entry_path is None:
+            entry_path = os.path.join(self.cache_dir, key + ".pkl")
+            self._write_atomic(
+                entry_path,
+                lambda path: pd.to_pickle({"df": df, "col_specs": col_specs}, path),
+            )
+
+        logging.info(f"Cached {fp} in cache entry {entry_path}")
+        self.evict(keep=entry_path)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the total size of the
+        entries is at most `max_size`, never removing the entry `keep`, and
+        remove the remembered content hashes that are not used anymore"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_SUFFIXES):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        evicted = set()
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            _remove(path)
+            evicted.add(os.path.splitext(os.path.basename(path))[0])
+            total_size -= size
+
+        if evicted:
+            logging.info(f"Evicted {len(evicted)} entries from the dataset cache")
+        entry_keys = {
+            os.path.splitext(os.path.basename(path))[0] for _, _, path in entries
+        }
+        self._prune_keys(entry_keys - evicted)
+
+    def _prune_keys(self, entry_keys):
+        """Remove the remembered content hashes of files that changed or were
+        removed since they were hashed and of entries that are not cached"""
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".key"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path) as f:
+                    key, stat_id = f.read().split("\n")[:2]
+            except (OSError, ValueError):
+                _remove(path)
+                continue
+            if key not in entry_keys or not _is_current(stat_id):
+                _remove(path)
+
+    def _write_atomic(self, path, write):
+        """Write a file through a temporary file in the cache directory, so
+        that other processes never read partially written entries"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _to_arrow(df, col_specs):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"asreview_preprocess"] = json.dumps({"col_specs": col_specs}).encode()
+        return table.replace_schema_metadata(metadata)
+
+    @staticmethod
+    def _read_feather(path):
+        table = feather.read_table(path, memory_map=True)
+        col_specs = json.loads(table.schema.metadata[b"asreview_preprocess"])[
+            "col_specs"
+        ]
+        return table.to_pandas(), col_specs
+
+
+def _write_text(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,30 +1,253 @@
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
 from asreview.data import load_data as asreview_load_data
 from asreview.exceptions import BadFileFormatError
 from asreviewcontrib.preprocess.config import DEDUPLICATION_COLUMN_DEFINITIONS
+from asreviewcontrib.preprocess.data.cache import DEFAULT_CACHE_SIZE, DatasetCache
 from asreviewcontrib.preprocess.io import io_utils, xml_reader
 
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def sniff_format(input_filepath):
+    """Sniff the compression and format of a file from its extension and
+    first bytes
+
+    Parameters
+    ----------
+    input_filepath : str, pathlib.Path
+        Path of a local file
+
+    Returns
+    -------
+    tuple
+        tuple of:
+        compression ("gzip", "zip" or None), name of the (decompressed)
+        data and its format: ".xml" for XML files, otherwise the extension
+        of the name used for picking the ASReview reader
+    """
+    name = os.path.basename(str(input_filepath))
+    with open(input_filepath, "rb") as f:
+        magic = f.read(4)
+
+    compression = None
+    if magic.startswith(GZIP_MAGIC):
+        compression = "gzip"
+        if name.lower().endswith(".gz"):
+            name = name[:-3]
+    elif magic.startswith(ZIP_MAGIC) and name.lower().endswith(".zip"):
+        # Only .zip files, as .xlsx files are zip files as well
+        compression = "zip"
+        with zipfile.ZipFile(input_filepath) as archive:
+            name = _get_zip_member(archive)
+
+    with _open_decompressed(input_filepath, compression) as f:
+        head = f.read(1024)
+    if _is_xml(head):
+        return compression, name, ".xml"
+
+    return compression, name, os.path.splitext(name)[1].lower()
+
+
+def _get_zip_member(archive):
+    members = [info.filename for info in archive.infolist() if not info.is_dir()]
+    if len(members) != 1:
+        raise BadFileFormatError(
+            f"Zip files should contain a single dataset, found {len(members)} files"
+        )
+    return members[0]
+
+
+@contextmanager
+def _open_decompressed(input_filepath, compression):
+    """Open a binary stream of the decompressed data of a file"""
+    if compression == "gzip":
+        with gzip.open(input_filepath, "rb") as f:
+            yield f
+    elif compression == "zip":
+        with zipfile.ZipFile(input_filepath) as archive:
+            with archive.open(_get_zip_member(archive)) as f:
+                yield f
+    else:
+        with open(input_filepath, "rb") as f:
+            yield f
+
+
+def _is_xml(head):
+    """Check if the first bytes of a file are the start of an XML document"""
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        head = head.decode("utf-16", errors="ignore").encode()
+    if head.startswith(b"\xef\xbb\xbf"):
+        head = head[3:]
+    head = head.lstrip()
+    return head.startswith(b"<?xml") or re.match(rb"<[A-Za-z_]", head) is not None
 
-def load_data(input_filepath):
+
+def load_data(input_filepath, n_jobs=1, cache_dir=None, cache_size=DEFAULT_CACHE_SIZE):
     """Load data from file, URL or plugin.
 
+    The reader is picked from the extension and the first bytes of local
+    files, which may be compressed with gzip or zip (a single dataset).
+    Standardised datasets of local files are cached in `cache_dir` if
+    given, and loaded from the cache while the file does not change.
+
     Parameters
     ----------
     input_filepath : str, pathlib.Path
         File path, URL, or alias of extension dataset.
         Supported file extensions are:
-        .csv, .tab, .tsv, .xlsx, .ris, .txt and .xml (Endnote XML)
+        .csv, .tab, .tsv, .xlsx, .ris, .txt and .xml (Endnote XML),
+        optionally followed by .gz or in a .zip file
+    n_jobs : int, optional
+        Number of processes used for parsing large Endnote XML files,
+        by default 1. If -1, all cores are used.
+    cache_dir : str, pathlib.Path, optional
+        Directory of the cache of standardised datasets, by default None
+        (no cache)
+    cache_size : int, optional
+        Maximum total size of the cached datasets in bytes, least recently
+        used datasets are removed from larger caches, by default 1 GiB
     """
-    try:
+    cache = None
+    if cache_dir is not None and os.path.isfile(input_filepath):
+        cache = DatasetCache(cache_dir, max_size=cache_size)
+        cached = cache.get(input_filepath)
+        if cached is not None:
+            return cached
+
+    if not os.path.isfile(input_filepath):
+        # URL or extension dataset
         df = asreview_load_data(input_filepath).df
-    except BadFileFormatError:
-        try:
-            df = asreview_load_data(
-                input_filepath, reader=xml_reader.EndnoteXMLReader
-            ).df
-        except Exception:
-            raise BadFileFormatError
+    else:
+        compression, name, data_format = sniff_format(input_filepath)
+        if data_format == ".xml":
+            try:
+                if compression is None:
+                    df = xml_reader.EndnoteXMLReader.read_data(
+                        input_filepath, n_jobs=n_jobs
+                    )
+                else:
+                    with _open_decompressed(input_filepath, compression) as f:
+                        df = xml_reader.EndnoteXMLReader.read_data(f)
+            except Exception:
+                raise BadFileFormatError(
+                    f"Importing Endnote XML file {input_filepath} not possible."
+                )
+        elif compression is None:
+            df = asreview_load_data(input_filepath).df
+        else:
+            # ASReview readers need a file with the extension of the format
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_filepath = os.path.join(tmp_dir, os.path.basename(name))
+                with _open_decompressed(input_filepath, compression) as f:
+                    with open(tmp_filepath, "wb") as tmp_f:
+                        shutil.copyfileobj(f, tmp_f)
+                df = asreview_load_data(tmp_filepath).df
 
     df, col_specs = io_utils._standardize_dataframe_for_deduplication(
         df, column_spec=DEDUPLICATION_COLUMN_DEFINITIONS
     )
+    if cache is not None:
+        cache.put(input_filepath, df, col_specs)
+    return df, col_specs
+
+
+def load_datasets(
+    input_filepaths, n_jobs=None, cache_dir=None, cache_size=DEFAULT_CACHE_SIZE
+):
+    """Load and standardise multiple datasets in a pool of processes and
+    combine them into a single dataset
+
+    Parameters
+    ----------
+    input_filepaths : list
+        File paths, URLs, or aliases of extension datasets, every dataset
+        only once
+    n_jobs : int, optional
+        Number of processes used for loading, by default one per dataset
+        up to the number of cores
+    cache_dir : str, pathlib.Path, optional
+        Directory of the cache of standardised datasets, by default None
+        (no cache)
+    cache_size : int, optional
+        Maximum total size of the cached datasets in bytes, by default 1 GiB
+
+    Returns
+    -------
+    tuple
+        tuple of:
+        combined dataset with new record_ids, the columns of the column
+        specification renamed to their standard names and a categorical
+        'source' column with the name of the file every record comes from,
+        and the combined column specification
+    """
+    input_filepaths = list(input_filepaths)
+    # Every dataset is a different source, so datasets can not be repeated
+    input_ids = [
+        os.path.realpath(path) if os.path.isfile(path) else str(path)
+        for path in input_filepaths
+    ]
+    counts = Counter(input_ids)
+    repeated = [
+        str(path)
+        for path, input_id in zip(input_filepaths, input_ids)
+        if counts[input_id] > 1
+    ]
+    if repeated:
+        raise ValueError(
+            f"Datasets {repeated} are the same file or URL. Please give every "
+            "dataset only once"
+        )
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(input_filepaths))
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            loaded = list(
+                executor.map(
+                    load_data,
+                    input_filepaths,
+                    repeat(1),
+                    repeat(cache_dir),
+                    repeat(cache_size),
+                )
+            )
+    else:
+        loaded = [
+            load_data(path, cache_dir=cache_dir, cache_size=cache_size)
+            for path in input_filepaths
+        ]
+
+    sources = [os.path.basename(str(path)) for path in input_filepaths]
+    if len(set(sources)) < len(sources):
+        sources = [str(path) for path in input_filepaths]
+
+    # Columns are combined by their standard names, as the datasets may name
+    # them differently, e.g. 'Title' and 'title'
+    loaded = [io_utils._rename_to_column_spec(df, specs) for df, specs in loaded]
+    col_specs = {}
+    for _, specs in loaded:
+        col_specs.update(specs)
+
+    df = pd.concat([df for df, _ in loaded], ignore_index=True)
+    df.index.name = "record_id"
+    df["source"] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(loaded)), [len(df) for df, _ in loaded]),
+        categories=sources,
+    )
+
     return df, col_specs
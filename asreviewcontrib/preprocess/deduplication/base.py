@@ -1,10 +1,23 @@
+import logging
+import os
 from abc import ABC, abstractmethod
 from itertools import combinations
 
 import numpy as np
 import pandas as pd
 import recordlinkage
-from asreviewcontrib.preprocess.config import COLS_FOR_DEDUPE
+from asreviewcontrib.preprocess.config import (
+    BLOCK_POLICIES,
+    COLS_FOR_DEDUPE,
+    INDEXING_METHODS,
+)
+from asreviewcontrib.preprocess.deduplication import (
+    compare,
+    grouping,
+    incremental,
+    indexing,
+)
+from asreviewcontrib.preprocess.io import io_utils
 
 PAIRS_COLUMNS = [
     "record_id1",
@@ -43,61 +56,540 @@ PAIRS_COLUMNS = [
 
 
 class BaseDedup(ABC):
-    """Abstract class for deduplication methods"""
+    """Abstract class for deduplication methods
+
+    Parameters
+    ----------
+    indexing : str, optional
+        Indexing method used for the blocking keys of the method, either
+        "block" for exact blocking, "minhash" for MinHash LSH blocking
+        of near-duplicates or "sortedneighbourhood" for sorted
+        neighbourhood indexing of near matches, by default "block"
+    **indexing_kwargs
+        Keyword arguments passed to the indexing algorithm, e.g. `n_bands`
+        and `n_rows` for "minhash" or `window` for "sortedneighbourhood"
+    n_jobs : int, optional
+        Number of processes used for cleaning records and computing
+        similarity features, by default 1. If -1, all cores are used.
+    batch_size : int, optional
+        Maximum number of candidate pairs compared and filtered at once,
+        by default 1000000
+    max_block_size : int, optional
+        Blocks of exact blocking and buckets of MinHash LSH bands with more
+        records are handled according to `block_policy`, by default None
+        (no maximum)
+    block_policy : str, optional
+        Policy for oversized blocks, "keep", "skip", "split" or "subblock",
+        by default "keep"
+    subblock_cols : list, optional
+        Columns combined for sub-blocking oversized blocks with the
+        "subblock" policy, by default ["year", "journal", "pages"]
+    cross_source_only : bool, optional
+        Only consider pairs of records from different sources (the 'source'
+        column of datasets combined from multiple files), by default False
+    compare_backend : str, optional
+        Backend for computing similarity features, either "rapidfuzz",
+        "recordlinkage" or "auto" for rapidfuzz if it is installed,
+        by default "auto"
+    """
+
+    def __init__(
+        self,
+        indexing="block",
+        n_jobs=1,
+        compare_backend="auto",
+        batch_size=1000000,
+        max_block_size=None,
+        block_policy="keep",
+        subblock_cols=("year", "journal", "pages"),
+        cross_source_only=False,
+        **indexing_kwargs,
+    ):
+        super(BaseDedup, self).__init__()
+        if indexing not in INDEXING_METHODS:
+            raise ValueError(
+                f"Indexing method '{indexing}' is not available. "
+                f"Please use one from {INDEXING_METHODS}"
+            )
+        self.indexing = indexing
+        self.indexing_kwargs = indexing_kwargs
+        self.n_jobs = n_jobs
+        self.compare_backend = compare_backend
+        self.batch_size = batch_size
+
+        if block_policy not in BLOCK_POLICIES:
+            raise ValueError(
+                f"Block policy '{block_policy}' is not available. "
+                f"Please use one from {BLOCK_POLICIES}"
+            )
+        self.max_block_size = max_block_size
+        self.block_policy = block_policy
+        self.subblock_cols = list(subblock_cols)
+        self.block_plans = []
+
+        self.cross_source_only = cross_source_only
+        self.sources = None
+        self.n_left = None
+        self._executor = None
 
     @abstractmethod
     def dedup(self, data_df, drop_duplicates=True):
 
         raise NotImplementedError
 
-    def _create_combined_columns(
-        self,
-        concat_columns,
-    ):
-        """Create combined columns by concatenation"""
+    @abstractmethod
+    def _prepare_data(self, df):
+        """Clean the columns of the dataset used for deduplication into
+        `data_df` and create the blocking keys
+
+        Returns
+        -------
+        tuple
+            tuple of:
+            key_cols (blocking key columns indexed with the indexing method)
+            and block_cols (columns always used for exact blocking)
+        """
+        raise NotImplementedError
+
+    def link(self, df_left, df_right, drop_duplicates=False):
+        """Find records of one dataset that are duplicates of records in
+        another dataset
+
+        Both datasets are assumed to be deduplicated already, so only cross
+        pairs of a record from `df_left` and a record from `df_right` are
+        indexed and compared. Blocks are planned and oversized blocks are
+        handled according to the block policy on the records of both
+        datasets. The datasets are combined on the standard names of their
+        columns, so they may name their columns differently.
+
+        Parameters
+        ----------
+        df_left : pd.DataFrame
+            Existing records, e.g. an already screened set
+        df_right : pd.DataFrame
+            New records, e.g. a new search export
+        drop_duplicates : bool, optional
+            Remove records of `df_right` that are duplicates of records in
+            `df_left`, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            Records of `df_right` with the columns duplicate_group_id and
+            keep_remove. Records with a duplicate in `df_left` are marked
+            REMOVE and share their duplicate_group_id with the duplicate
+            records of `df_left`.
+        """
+        if self.cross_source_only:
+            raise ValueError(
+                "Linking only compares records of different datasets, "
+                "cross_source_only can not be combined with linking"
+            )
+
+        df = pd.concat(
+            [
+                io_utils._rename_to_column_spec(df_left)[0],
+                io_utils._rename_to_column_spec(df_right)[0],
+            ],
+            ignore_index=True,
+        )
+        df.index.name = df_right.index.name
+
+        self.n_left = len(df_left)
+        try:
+            linked = self.dedup(df, drop_duplicates=False)
+        finally:
+            self.n_left = None
+
+        # All groups of duplicates have records from both datasets
+        linked = linked.loc[linked.index >= len(df_left)].sort_index()
+        df = df_right.copy()
+        df["duplicate_group_id"] = linked["duplicate_group_id"].to_numpy()
+        df["keep_remove"] = np.where(df["duplicate_group_id"] > 0, "REMOVE", "KEEP")
+
+        if drop_duplicates:
+            df = df.loc[df["keep_remove"] == "KEEP"].drop(
+                ["keep_remove", "duplicate_group_id"], axis=1
+            )
+
+        return df
+
+    def dedup_incremental(self, df, corpus_path, drop_duplicates=False):
+        """Deduplicate new records against a persisted, already deduplicated
+        corpus and add them to the corpus
+
+        Only pairs of new records with the corpus and with each other are
+        generated, using the blocking-key index of the corpus, so the
+        runtime depends on the number of new records. Duplicate groups of
+        the corpus are updated in place when new records link them. If
+        there is no corpus at `corpus_path` yet, the records are
+        deduplicated from scratch and saved as the corpus.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            New records
+        corpus_path : str
+            Path of the persisted corpus index
+        drop_duplicates : bool, optional
+            Remove duplicate records from the new records, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            New records with record_ids following the corpus. Records that
+            are duplicates of corpus records are marked REMOVE, groups are
+            labelled by their representative record_id + 1.
+        """
+        self._check_incremental_options()
+
+        method = self.__class__.__name__
+        if os.path.exists(corpus_path):
+            corpus = incremental.CorpusIndex.load(corpus_path)
+            if corpus.method != method:
+                raise ValueError(
+                    f"The corpus at {corpus_path} was deduplicated with "
+                    f"'{corpus.method}' instead of '{method}'"
+                )
+        else:
+            corpus = None
+
+        # The corpus is indexed on the standard column names, which do not
+        # depend on the column names of the dataset, e.g. 'DOI' or 'doi'
+        col_specs = io_utils._get_column_spec(df)
+        df, std_specs = io_utils._rename_to_column_spec(df, col_specs)
+        original_names = {std_specs[spec]: col for spec, col in col_specs.items()}
+
+        first_record_id = corpus.next_record_id if corpus else 0
+        df.index = pd.RangeIndex(
+            first_record_id, first_record_id + len(df), name=df.index.name
+        )
+        key_cols, block_cols = self._prepare_data(df)
+        self._set_missing_values()
+        cols = list(block_cols) + list(key_cols)
+
+        # Pairs of new records with the representative of a corpus group
+        # having the same key and pairs of new records with each other
+        new_rids = df.index.to_numpy()
+        pairs = [np.empty((0, 2), dtype=np.int64)]
+        self.block_plans = []
+        for col in cols:
+            keys = self._plan_block_keys(col)
+            if corpus:
+                reps = corpus.lookup(col, keys)
+                found = reps >= 0
+                pairs.append(np.stack([new_rids[found], reps[found]], axis=1))
+            for block_pairs in indexing.iter_block_pairs(
+                keys, batch_size=self.batch_size
+            ):
+                pairs.append(new_rids[block_pairs])
+        pairs = np.concatenate(pairs)
+
+        # Group new records and linked corpus groups, with the smallest
+        # record_id of each group as its representative
+        nodes = np.union1d(np.unique(pairs), new_rids)
+        labels = self._get_group_labels(pairs, nodes)
+        nodes_df = pd.DataFrame(
+            {"label": np.where(labels > 0, labels, -nodes - 1), "rep": nodes}
+        )
+        group_reps = nodes_df.groupby("label")["rep"].transform("min")
+        group_reps = pd.Series(group_reps.to_numpy(), index=nodes)
+        group_sizes = group_reps.map(group_reps.value_counts())
+
+        if corpus:
+            corpus_nodes = nodes < first_record_id
+            corpus.merge_groups(group_reps[corpus_nodes])
+            corpus.add_records(self.data_df, cols, group_reps.loc[new_rids])
+        else:
+            corpus = incremental.CorpusIndex.build(
+                method, self.data_df, cols, group_reps.loc[new_rids]
+            )
+        corpus.save(corpus_path)
+
+        # Keep the best record of groups of only new records, new records
+        # in groups with corpus records are duplicates of the corpus
+        group_labels = np.where(
+            group_sizes.loc[new_rids] > 1, group_reps.loc[new_rids] + 1, 0
+        )
+        df = self._dedup(df, group_labels, drop_duplicates=False)
+        in_corpus = (df["duplicate_group_id"] > 0) & (
+            df["duplicate_group_id"] - 1 < first_record_id
+        )
+        df.loc[in_corpus, "keep_remove"] = "REMOVE"
+        df = df.rename(columns=original_names)
+
+        if drop_duplicates:
+            df = df.loc[df["keep_remove"] == "KEEP"].drop(
+                ["keep_remove", "duplicate_group_id"], axis=1
+            )
+
+        return df
+
+    def _check_incremental_options(self):
+        """Raise ValueError for options that incremental deduplication does
+        not support
+
+        The corpus index assumes that records with the same key are in the
+        same group, which block policies other than "keep" break, and it does
+        not keep the sources of the corpus records."""
+        if self.indexing != "block":
+            raise ValueError(
+                "Incremental deduplication is only supported with 'block' indexing"
+            )
+        if self.max_block_size is not None and self.block_policy != "keep":
+            raise ValueError(
+                f"Block policy '{self.block_policy}' is not supported with "
+                "incremental deduplication. Please use 'keep'"
+            )
+        if self.cross_source_only:
+            raise ValueError(
+                "Only deduplicating records across sources is not supported "
+                "with incremental deduplication"
+            )
+
+    def _create_combined_columns(self, concat_columns, hashed=True):
+        """Create combined columns by concatenation
+
+        If `hashed`, the combined columns hold 64-bit hashes of the
+        concatenated strings, which are much cheaper to block on than the
+        full strings. Combinations of only empty values are left missing.
+        """
         combined_col_names = []
-        for ind, columns in enumerate(concat_columns):
+        for columns in concat_columns:
             columns = [self.col_specs[col] for col in columns]
             new_col_name = f"{'_'.join(columns)}"
-            self.data_df[new_col_name] = (
-                self.data_df[columns].astype(str).fillna("").agg(" ".join, axis=1)
+            values = self.data_df[columns].fillna("").astype(str)
+            combined = (
+                values[columns[0]]
+                .str.cat([values[col] for col in columns[1:]], sep=" ")
+                .str.replace(r"\s+", " ", regex=True)
+                .str.strip()
             )
+            if hashed:
+                combined = indexing.hash_strings(combined)
+            self.data_df[new_col_name] = combined
             combined_col_names.append(new_col_name)
 
         return combined_col_names
 
-    def _get_candidate_pairs(self, block_cols):
-        """Get candidate pairs using records linkage blocking method of indexing"""
-        # Replacing empty strings with NAN so that Record Linkage doesnot
-        # consider two empty strings as a match while blocking
+    def _get_key_indexer(self, key_col):
+        """Get indexing algorithm for a blocking key column"""
+        if self.indexing == "minhash":
+            return indexing.MinHashLSH(left_on=key_col, **self.indexing_kwargs)
+        if self.indexing == "sortedneighbourhood":
+            return indexing.SortedNeighbourhood(left_on=key_col, **self.indexing_kwargs)
+
+        return recordlinkage.index.Block(left_on=key_col)
+
+    def _set_sources(self, df, source_col="source"):
+        """Keep source codes of the records for only considering pairs of
+        records from different sources"""
+        if not self.cross_source_only:
+            self.sources = None
+        elif source_col not in df.columns:
+            raise ValueError(
+                f"Column '{source_col}' is required for only deduplicating "
+                "records across sources"
+            )
+        else:
+            self.sources = pd.Series(
+                pd.Categorical(df[source_col]).codes, index=df.index
+            )
+
+    def _filter_cross_source(self, candidate_pairs):
+        """Remove candidate pairs of records from the same source"""
+        if self.sources is None:
+            return candidate_pairs
+
+        source1 = self.sources.loc[candidate_pairs.get_level_values(0)].to_numpy()
+        source2 = self.sources.loc[candidate_pairs.get_level_values(1)].to_numpy()
+        return candidate_pairs[source1 != source2]
+
+    def _set_missing_values(self):
+        """Replace empty values with NAN so that two empty values are not
+        considered as a match while blocking"""
         string_columns = self.data_df.select_dtypes("object").columns
-        self.data_df[string_columns] = (
-            self.data_df[string_columns]
-            .fillna("")
-            .astype("object")
-            .applymap(lambda val: np.nan if not val else val)
+        values = self.data_df[string_columns].fillna("").astype("object")
+        # Empty strings (and the empty lists of custom cleaning functions)
+        # are the only falsy values of the cleaned columns
+        empty = ~values.to_numpy().astype(bool)
+        self.data_df[string_columns] = values.mask(empty)
+
+    def _plan_block_keys(self, col, keys=None, name=None):
+        """Estimate the number of candidate pairs of blocking on a column
+        (or on `keys` aligned with the records) and handle oversized blocks
+        according to the block policy
+
+        The plan is logged and saved in `block_plans` for reporting."""
+        if keys is None:
+            keys = self.data_df[col]
+        name = col if name is None else name
+        plan = indexing.plan_blocks(
+            keys, max_block_size=self.max_block_size, n_left=self.n_left
+        )
+        plan["column"] = name
+        plan["policy"] = self.block_policy if len(plan["oversized"]) else None
+
+        if plan["policy"] is not None:
+            subblock_keys = None
+            if self.block_policy == "subblock":
+                cols = [self.col_specs[c] for c in self.subblock_cols]
+                values = self.data_df[cols].fillna("").astype(str)
+                subblock_keys = (
+                    values[cols[0]]
+                    .str.cat([values[c] for c in cols[1:]], sep=" ")
+                    .str.strip()
+                )
+            keys = indexing.apply_block_policy(
+                keys,
+                plan["oversized"],
+                self.block_policy,
+                self.max_block_size,
+                subblock_keys=subblock_keys,
+            )
+            plan["n_pairs_after_policy"] = indexing.plan_blocks(
+                keys, n_left=self.n_left
+            )["n_pairs"]
+
+        logging.info(
+            f"Blocking on '{name}': {plan['n_blocks']} blocks, "
+            f"{plan['n_pairs']} candidate pairs estimated, "
+            f"{len(plan['oversized'])} oversized blocks"
         )
+        self.block_plans.append(plan)
 
-        # Indexing using blocking
-        indexer = recordlinkage.Index()
-        for col in block_cols:
-            indexer.block(left_on=col)
-        candidate_pairs = indexer.index(self.data_df)
+        return keys
 
-        return candidate_pairs
+    def _iter_candidate_pairs(self, key_cols, block_cols=()):
+        """Yield candidate pairs in batches of at most `batch_size` pairs
 
-    def _get_similarity_features(self, candidate_pairs, method="jarowinkler"):
-        """Calculate similarity metrics for all columns for candidate pairs
-        using given method (default = jarowinkler)"""
-        compare_cl = recordlinkage.Compare()
-        for col in COLS_FOR_DEDUPE:
-            compare_cl.string(
-                self.col_specs[col],
-                self.col_specs[col],
-                method=method,
-                label=col,
+        Exact blocking generates the pairs block by block, so that all
+        candidate pairs are never materialised at once. MinHash LSH blocks
+        on the keys of every band in the same way, with the block policy
+        applied to oversized buckets. Pairs of sorted neighbourhood
+        indexing are indexed at once and yielded in batches. Pairs found by
+        more than one column are yielded more than once.
+
+        If `n_left` is set, only pairs of one of the first `n_left` records
+        with one of the other records are yielded, for linking datasets."""
+        self._set_missing_values()
+
+        record_ids = self.data_df.index.to_numpy()
+        names = [f"{self.data_df.index.name}_1", f"{self.data_df.index.name}_2"]
+
+        block_cols = list(block_cols)
+        if self.indexing == "block":
+            block_cols.extend(key_cols)
+            key_cols = []
+
+        # Plan all blocks before any pairs are generated
+        self.block_plans = []
+        block_keys = [self._plan_block_keys(col) for col in block_cols]
+
+        for keys in block_keys:
+            if self.n_left is None:
+                block_pairs = indexing.iter_block_pairs(
+                    keys, batch_size=self.batch_size
+                )
+            else:
+                block_pairs = indexing.iter_link_block_pairs(
+                    keys, self.n_left, batch_size=self.batch_size
+                )
+            for pairs in block_pairs:
+                yield pd.MultiIndex.from_arrays(
+                    [record_ids[pairs[:, 0]], record_ids[pairs[:, 1]]], names=names
+                )
+
+        if self.indexing == "minhash":
+            for col in key_cols:
+                indexer = self._get_key_indexer(col)
+                band_keys, signatures = indexer.lsh_keys(self.data_df)
+                band_keys = [
+                    self._plan_block_keys(
+                        col, band_keys[band], name=f"{col} (LSH band {band + 1})"
+                    )
+                    for band in band_keys
+                ]
+                for pairs in indexer.iter_pairs(
+                    band_keys,
+                    signatures,
+                    batch_size=self.batch_size,
+                    n_left=self.n_left,
+                ):
+                    yield pd.MultiIndex.from_arrays(
+                        [record_ids[pairs[:, 0]], record_ids[pairs[:, 1]]],
+                        names=names,
+                    )
+            return
+
+        for col in key_cols:
+            if self.n_left is None:
+                candidate_pairs = self._get_key_indexer(col).index(self.data_df)
+            else:
+                candidate_pairs = self._get_key_indexer(col).index(
+                    self.data_df.iloc[: self.n_left], self.data_df.iloc[self.n_left :]
+                )
+            for start in range(0, len(candidate_pairs), self.batch_size):
+                yield candidate_pairs[start : start + self.batch_size]
+
+    def _get_duplicate_pair_rids(self, key_cols, block_cols=(), filter_pipeline=None):
+        """Get record_ids of duplicate pairs by indexing, comparing and
+        filtering candidate pairs batch by batch
+
+        Only the record_ids of the pairs surviving the filters are kept, so
+        peak memory scales with `batch_size` instead of the total number of
+        candidate pairs. Without `filter_pipeline`, all candidate pairs are
+        considered duplicates. Similarity features of all batches are
+        computed by one pool of processes sharing the dataset."""
+        pair_rids = [np.empty((0, 2), dtype=np.int64)]
+
+        if filter_pipeline is not None:
+            self._executor = compare.get_feature_executor(
+                self.data_df, self.col_specs, n_jobs=self.n_jobs
             )
-        features = compare_cl.compute(candidate_pairs, self.data_df)
+        try:
+            for candidate_pairs in self._iter_candidate_pairs(key_cols, block_cols):
+                candidate_pairs = self._filter_cross_source(candidate_pairs)
+                if filter_pipeline is None:
+                    pair_rids.append(
+                        np.sort(candidate_pairs.to_frame().to_numpy(np.int64), axis=1)
+                    )
+                    continue
+
+                pairs_df = self._get_pairs_df(candidate_pairs)
+                features = self._get_similarity_features(candidate_pairs)
+                pairs_df = self._get_pairs_w_features(pairs_df, features)
+                pairs_df = self._handle_missing_feature_values(pairs_df)
+                pairs_df = filter_pipeline.apply_pipe(pairs_df)
+                pair_rids.append(self._get_pair_rids(pairs_df))
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        return np.concatenate(pair_rids)
+
+    def _get_similarity_features(
+        self, candidate_pairs, method="jarowinkler", chunk_size=50000
+    ):
+        """Calculate similarity metrics for all columns for candidate pairs
+        using given method (default = jarowinkler)
+
+        Similarities are computed with the comparator backend of the
+        deduplicator. If `n_jobs` of the deduplicator is not 1, candidate
+        pairs are split in chunks of `chunk_size` pairs which are compared
+        in parallel, by the pool of processes of the current deduplication
+        run if there is one."""
+        features = compare.compute_features_parallel(
+            candidate_pairs,
+            self.data_df,
+            self.col_specs,
+            method=method,
+            n_jobs=self.n_jobs,
+            chunk_size=chunk_size,
+            backend=self.compare_backend,
+            executor=self._executor,
+        )
 
         return features
 
@@ -106,11 +598,11 @@ class BaseDedup(ABC):
         columns for the records in the pair"""
         pairs_df = pd.DataFrame()
 
-        pairs_df["record_id1"] = [id1 for id1, _ in candidate_pairs]
-        pairs_df["record_id2"] = [id2 for _, id2 in candidate_pairs]
+        pairs_df["record_id1"] = candidate_pairs.get_level_values(0)
+        pairs_df["record_id2"] = candidate_pairs.get_level_values(1)
 
-        idx1 = [id1 - 1 for id1, _ in candidate_pairs]
-        idx2 = [id2 - 1 for _, id2 in candidate_pairs]
+        idx1 = self.data_df.index.get_indexer(pairs_df["record_id1"])
+        idx2 = self.data_df.index.get_indexer(pairs_df["record_id2"])
         for col in COLS_FOR_DEDUPE:
             pairs_df[f"{col}1"] = self.data_df[self.col_specs[col]].values[idx1]
             pairs_df[f"{col}2"] = self.data_df[self.col_specs[col]].values[idx2]
@@ -176,35 +668,25 @@ class BaseDedup(ABC):
         return pairs_df
 
     def _get_pair_rids(self, pairs_df):
-        """Get record_ids of pairs from the pairs dataframe"""
-        pairs_rids = [
-            tuple(sorted(pair))
-            for pair in pairs_df[["record_id1", "record_id2"]].values
-        ]
+        """Get record_ids of pairs from the pairs dataframe as an integer
+        array of shape (n_pairs, 2) with the smaller record_id first"""
+        pairs_rids = np.sort(
+            pairs_df[["record_id1", "record_id2"]].to_numpy(dtype=np.int64), axis=1
+        )
 
         return pairs_rids
 
+    def _get_group_labels(self, pair_rids, record_ids):
+        """Get duplicate group label for every record (0 if the record
+        has no duplicates) using union-find over pairs"""
+        return grouping.get_group_labels(pair_rids, record_ids)
+
     def _get_groups_from_pairs(self, pair_rids):
         """Get groups of duplicate records from pairs"""
-        groups = []
-
-        for id1, id2 in pair_rids:
-            added = False
-            for g in groups:
-                if id1 in g and id2 not in g:
-                    g.append(id2)
-                    added = True
-                    break
-                elif id2 in g and id1 not in g:
-                    g.append(id1)
-                    added = True
-                    break
-                elif id1 in g and id2 in g:
-                    added = True
-            if not added:
-                groups.append([id1, id2])
-
-        groups = [tuple(sorted(group)) for group in groups]
+        record_ids = np.unique(pair_rids)
+        labels = self._get_group_labels(pair_rids, record_ids)
+        groups = grouping.get_groups_from_labels(labels, record_ids)
+
         return groups
 
     def _get_pairs_from_groups(self, groups):
@@ -217,49 +699,46 @@ class BaseDedup(ABC):
 
         return pairs
 
-    def _dedup(self, df, groups_rids, drop_duplicates):
-        """Deduplicate dataset using final matching groups"""
-        duplicate_rids = [rid for group in groups_rids for rid in group]
-        unique_rids = [rid for rid in df.index.values if rid not in duplicate_rids]
-        arrange_rids = duplicate_rids + unique_rids
-        group_tags = [
-            tag for i, group in enumerate(groups_rids) for tag in [i + 1] * len(group)
-        ] + [0] * len(unique_rids)
-
-        df = df.loc[arrange_rids]
-        df["duplicate_group_id"] = group_tags
-
-        # Sort using abstract and year to get latest papers having abstracts
-        # from the group of duplicates
-        try:
-            df = df.sort_values(
-                [
-                    "duplicate_group_id",
-                    self.col_specs["abstract"],
-                    self.col_specs["year"],
-                ],
-                ascending=False,
-            )
-        except KeyError:
-            pass
-
-        groups_seen = []
-        keep_remove = []
-
-        for tag in df["duplicate_group_id"].values:
-            if tag == 0:
-                keep_remove.append("KEEP")
-            elif tag in groups_seen:
-                keep_remove.append("REMOVE")
-            else:
-                keep_remove.append("KEEP")
-                groups_seen.append(tag)
-
-        df["keep_remove"] = keep_remove
+    def _dedup(self, df, group_labels, drop_duplicates):
+        """Deduplicate dataset using duplicate group label of every record
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Dataset indexed by record_id
+        group_labels : np.ndarray
+            Duplicate group label aligned with the rows of `df`, 0 for
+            records without duplicates
+        drop_duplicates : bool
+            Remove duplicate records from dataset
+        """
+        df = df.copy()
+        group_labels = np.asarray(group_labels, dtype=np.int64)
+        df["duplicate_group_id"] = group_labels
+
+        # Single sort on group, abstract availability and year to keep the
+        # latest paper having abstract from every group of duplicates
+        sort_keys = [-group_labels]
+        abstract_col = self.col_specs.get("abstract")
+        if abstract_col in df.columns:
+            has_abstract = df[abstract_col].fillna("").astype(str).str.len() > 0
+            sort_keys.append(~has_abstract.to_numpy())
+        year_col = self.col_specs.get("year")
+        if year_col in df.columns:
+            year = pd.to_numeric(df[year_col], errors="coerce").to_numpy(dtype=float)
+            sort_keys.append(-np.nan_to_num(year, nan=-np.inf))
+        order = np.lexsort(sort_keys[::-1])
+
+        df = df.iloc[order]
+        sorted_labels = group_labels[order]
+
+        first_in_group = np.ones(len(df), dtype=bool)
+        first_in_group[1:] = sorted_labels[1:] != sorted_labels[:-1]
+        keep = first_in_group | (sorted_labels == 0)
+
+        df["keep_remove"] = np.where(keep, "KEEP", "REMOVE")
 
         if drop_duplicates:
-            df = df.loc[np.where(df["keep_remove"] == "KEEP")].drop(
-                ["keep_remove", "duplicate_group_id"], axis=1
-            )
+            df = df.loc[keep].drop(["keep_remove", "duplicate_group_id"], axis=1)
 
         return df
@@ -1,7 +1,14 @@
 import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
+import numpy as np
+import pandas as pd
 from asreviewcontrib.preprocess.base import BasePipeline
-from asreviewcontrib.preprocess.deduplication import dd_utils
+from asreviewcontrib.preprocess.config import CLEAN_ENGINES
+from asreviewcontrib.preprocess.deduplication import dd_utils, dd_vec_utils
+from asreviewcontrib.preprocess.deduplication.compare import _get_n_jobs
 from asreviewcontrib.preprocess.io import io_utils
 
 clean_funcs = {
@@ -17,18 +24,188 @@ clean_funcs = {
     "isbn": dd_utils.clean_isbn,
 }
 
+vec_clean_funcs = {
+    "title": dd_vec_utils.clean_title,
+    "abstract": dd_vec_utils.clean_abstract,
+    "authors": dd_vec_utils.clean_authors,
+    "year": dd_vec_utils.clean_year,
+    "doi": dd_vec_utils.clean_doi,
+    "journal": dd_vec_utils.clean_journal,
+    "pages": dd_vec_utils.clean_pages,
+    "volume": dd_vec_utils.clean_volume,
+    "number": dd_vec_utils.clean_number,
+    "isbn": dd_vec_utils.clean_isbn,
+}
+# Cleaning functions resolving approximate values, used if `resolve_journals`
+fuzzy_clean_funcs = {"journal": dd_utils.clean_journal_fuzzy}
+vec_fuzzy_clean_funcs = {"journal": dd_vec_utils.clean_journal_fuzzy}
+# Default cleaning functions transliterating non-ASCII values with unidecode
+transliterating_funcs = {
+    dd_utils.clean_title,
+    dd_utils.clean_abstract,
+    dd_utils.clean_authors,
+}
+
+# Caches of cleaned values shared by all pipelines, by column and function
+_clean_caches = {}
+
+
+def _clean_chunk(values, clean_func, vec_func=None):
+    """Clean a chunk of values with the vectorised cleaning function if
+    given, otherwise with the cleaning function for every value"""
+    if vec_func is not None:
+        return vec_func(values)
+    return values.apply(clean_func)
+
+
+class CleanCache:
+    """Bounded least recently used cache of cleaned values of a column
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cleaned values kept in the cache
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+
+    def lookup(self, values):
+        """Get cleaned values from the cache
+
+        Returns
+        -------
+        tuple
+            tuple of:
+            cleaned values (object array, None for values not in the cache)
+            and boolean mask of the values found in the cache
+        """
+        cleaned = np.empty(len(values), dtype=object)
+        found = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                cleaned[i] = self._values[value]
+            except KeyError:
+                continue
+            self._values.move_to_end(value)
+            found[i] = True
+
+        return cleaned, found
+
+    def update(self, values, cleaned):
+        """Add cleaned values to the cache, evicting the least recently
+        used values if the cache is full"""
+        for value, clean_value in zip(values, cleaned):
+            self._values[value] = clean_value
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+
 
 class CleanPipeline(BasePipeline):
-    """Class for cleaning columns of the dataset"""
+    """Class for cleaning columns of the dataset
+
+    Parameters
+    ----------
+    include : list, optional
+        Columns to clean, by default None (all columns)
+    exclude : list, optional
+        Columns not to clean if `include` is not given, by default None
+    engine : str, optional
+        Engine for the default cleaning functions, either "python" for
+        calling the function for every value or "vectorised" for pandas
+        string operations on whole columns, by default "python". Both give
+        the same values, functions added using 'add' are always called for
+        every value.
+    resolve_journals : bool, optional
+        Resolve approximate journal names that are no known abbreviation,
+        e.g. names with different case, punctuation or abbreviations, to
+        the full form of the journal, by default False
+    memoise : bool, optional
+        Clean every unique value of a column only once and map the cleaned
+        values back to the records, by default True
+    cache_size : int, optional
+        Maximum number of cleaned values per column kept in a least recently
+        used cache shared by all pipelines, so that values seen in earlier
+        calls are not cleaned again. Only used if `memoise`, by default None
+        (no cache)
+    n_jobs : int, optional
+        Number of processes used for cleaning, by default 1. If -1, all
+        cores are used. Columns are split in chunks which are cleaned in
+        parallel; cleaning functions added using 'add' must be picklable.
+    min_parallel_size : int, optional
+        Columns with fewer (unique) values are cleaned serially, as starting
+        the processes would take longer than cleaning, by default 20000
 
-    def __init__(self, include=None, exclude=None):
+    The pipeline is compiled into an immutable plan on first use, so one
+    pipeline can be applied to many frames or chunks. Columns listed in
+    `data_df.attrs["cleaned_columns"]` are not cleaned again. The number
+    of values cleaned, taken from the cache and transliterated in the last
+    call is logged and kept per column in `stats`.
+    """
+
+    def __init__(
+        self,
+        include=None,
+        exclude=None,
+        engine="python",
+        resolve_journals=False,
+        memoise=True,
+        cache_size=None,
+        n_jobs=1,
+        min_parallel_size=20000,
+    ):
         super(CleanPipeline, self).__init__()
+        if engine not in CLEAN_ENGINES:
+            raise ValueError(
+                f"Cleaning engine '{engine}' is not available. "
+                f"Please use one from {CLEAN_ENGINES}"
+            )
         self.include = include
         self.exclude = exclude
+        self.engine = engine
+        self.resolve_journals = resolve_journals
+        self.memoise = memoise
+        self.cache_size = cache_size
+        self.n_jobs = n_jobs
+        self.min_parallel_size = min_parallel_size
+        self._executor = None
+        self._plan = None
+        self.stats = {}
 
     def add(self, col_name, function):
         """Add a cleaning function to the pipeline"""
         self._pipeline.append((col_name, function))
+        self._plan = None
+
+    def compile(self):
+        """Compile the pipeline into an immutable plan of (column, cleaning
+        function) steps: the functions added using 'add' followed by the
+        default cleaning functions of the included columns"""
+        if self._plan is not None:
+            return self._plan
+
+        if self.include and self.exclude:
+            logging.warning(
+                "Both 'include' and 'exclude' are specified. Only 'include' will be used."
+            )
+        if self.include:
+            apply_cleaning = self.include
+        elif self.exclude:
+            apply_cleaning = [
+                clean for clean in clean_funcs if clean not in self.exclude
+            ]
+        else:
+            apply_cleaning = list(clean_funcs.keys())
+
+        default_funcs = clean_funcs
+        if self.resolve_journals:
+            default_funcs = {**clean_funcs, **fuzzy_clean_funcs}
+        self._plan = tuple(self._pipeline) + tuple(
+            (col_name, default_funcs[col_name]) for col_name in apply_cleaning
+        )
+
+        return self._plan
 
     def apply_pipe(self, data_df):
         """Apply functions in the cleaning pipeline to the dataset
@@ -46,26 +223,24 @@ class CleanPipeline(BasePipeline):
         data_df = data_df.copy().fillna("")
         col_specs = io_utils._get_column_spec(data_df)
 
-        if self.include and self.exclude:
-            logging.warning(
-                "Both 'include' and 'exclude' are specified. Only 'include' will be used."
-            )
-        if self.include:
-            apply_cleaning = self.include
-        elif self.exclude:
-            apply_cleaning = [
-                clean for clean in clean_funcs if clean not in self.exclude
-            ]
-        else:
-            apply_cleaning = list(clean_funcs.keys())
-
-        # This takes care of the case where custom cleaning functions are
-        # added to pipeline using 'add'
-        for col_name in apply_cleaning:
-            self.add(col_name, clean_funcs[col_name])
+        plan = self.compile()
+        self.stats = {}
+        already_cleaned = set(data_df.attrs.get("cleaned_columns", ()))
 
-        for col, clean_func in self._pipeline:
-            data_df[col_specs[col]] = data_df[col_specs[col]].apply(clean_func)
+        n_jobs = _get_n_jobs(self.n_jobs)
+        if n_jobs > 1 and len(data_df) >= self.min_parallel_size:
+            self._executor = ProcessPoolExecutor(max_workers=n_jobs)
+        try:
+            for col, clean_func in plan:
+                if col_specs[col] in already_cleaned:
+                    continue
+                data_df[col_specs[col]] = self._clean_column(
+                    data_df[col_specs[col]], col, clean_func
+                )
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
 
         data_df = data_df.sort_index()
         try:
@@ -74,5 +249,97 @@ class CleanPipeline(BasePipeline):
             pass
 
         data_df = data_df.fillna("")
+        data_df.attrs["cleaned_columns"] = sorted(
+            already_cleaned | {col_specs[col] for col, _ in plan}
+        )
 
         return data_df
+
+    def _clean_values(self, values, col, clean_func):
+        """Clean a series of values with the engine of the pipeline, in
+        chunks cleaned by the process pool for large series"""
+        vec_func = None
+        if self.engine == "vectorised":
+            if clean_func is clean_funcs.get(col):
+                vec_func = vec_clean_funcs[col]
+            elif clean_func is fuzzy_clean_funcs.get(col):
+                vec_func = vec_fuzzy_clean_funcs[col]
+
+        if self._executor is None or len(values) < self.min_parallel_size:
+            return _clean_chunk(values, clean_func, vec_func)
+
+        # A few chunks per process to balance columns of uneven lengths
+        n_chunks = 4 * _get_n_jobs(self.n_jobs)
+        chunk_size = -(-len(values) // n_chunks)
+        chunks = [
+            values.iloc[start : start + chunk_size]
+            for start in range(0, len(values), chunk_size)
+        ]
+        cleaned = self._executor.map(
+            _clean_chunk, chunks, repeat(clean_func), repeat(vec_func)
+        )
+
+        return pd.concat(list(cleaned))
+
+    def _clean_column(self, values, col, clean_func):
+        """Clean a column, cleaning every unique value only once if
+        `memoise`. Missing values, e.g. returned by an earlier cleaning
+        function, are left missing when memoising."""
+        if not self.memoise:
+            self._log_stats(values, clean_func, values, n_unique=None, n_cached=0)
+            return self._clean_values(values, col, clean_func)
+
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques, dtype=values.dtype)
+
+        if self.cache_size:
+            cache = _clean_caches.setdefault(
+                (col, clean_func), CleanCache(self.cache_size)
+            )
+            cache.maxsize = self.cache_size
+            cleaned, found = cache.lookup(uniques)
+            missing = uniques[~found]
+            if len(missing):
+                cleaned_missing = self._clean_values(missing, col, clean_func)
+                cleaned[~found] = cleaned_missing.to_numpy()
+                cache.update(missing, cleaned_missing)
+        else:
+            missing = uniques
+            cleaned = self._clean_values(uniques, col, clean_func).to_numpy()
+            found = np.zeros(len(uniques), dtype=bool)
+
+        self._log_stats(
+            values, clean_func, missing, n_unique=len(uniques), n_cached=found.sum()
+        )
+
+        cleaned = cleaned[codes]
+        # Missing values have code -1 and are not among the unique values
+        is_missing = codes < 0
+        if is_missing.any():
+            cleaned = cleaned.astype(object)
+            cleaned[is_missing] = None
+
+        return pd.Series(cleaned, index=values.index, name=values.name)
+
+    def _log_stats(self, values, clean_func, cleaned_values, n_unique, n_cached):
+        """Log and keep in `stats` how many values of a column were cleaned,
+        taken from the cache and transliterated"""
+        n_transliterated = 0
+        if clean_func in transliterating_funcs:
+            n_transliterated = int((~dd_vec_utils.is_ascii(cleaned_values)).sum())
+        self.stats[values.name] = {
+            "n_values": len(values),
+            "n_unique": n_unique,
+            "n_cached": int(n_cached),
+            "n_cleaned": len(cleaned_values),
+            "n_transliterated": n_transliterated,
+        }
+
+        unique = "" if n_unique is None else f"{n_unique} unique, "
+        logging.info(
+            f"Cleaning '{values.name}': {len(values)} values, {unique}"
+            f"{n_cached} from cache, {len(cleaned_values)} cleaned "
+            f"({n_transliterated} transliterated), "
+            f"{1 - len(cleaned_values) / max(len(values), 1):.1%} of cleaning "
+            "calls saved"
+        )
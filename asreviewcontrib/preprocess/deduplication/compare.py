@@ -0,0 +1,235 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+import recordlinkage
+from asreviewcontrib.preprocess.config import COLS_FOR_DEDUPE
+
+try:
+    from rapidfuzz import fuzz, process
+    from rapidfuzz.distance import JaroWinkler, Levenshtein
+except ImportError:
+    process = None
+
+COMPARE_BACKENDS = ["auto", "rapidfuzz", "recordlinkage"]
+
+# Data shared with the worker processes, set once per worker by
+# `_init_worker` so that the string columns are not pickled for every chunk
+_worker_data = {}
+
+
+def _init_worker(data_df, col_specs):
+    _worker_data["data_df"] = data_df
+    _worker_data["col_specs"] = col_specs
+
+
+def _compute_chunk(candidate_pairs, method, backend):
+    return compute_features(
+        candidate_pairs,
+        _worker_data["data_df"],
+        _worker_data["col_specs"],
+        method=method,
+        backend=backend,
+    )
+
+
+def _get_n_jobs(n_jobs):
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def _get_backend(backend, method="jarowinkler"):
+    """Resolve the comparator backend, falling back to recordlinkage
+    when rapidfuzz is not installed"""
+    if backend not in COMPARE_BACKENDS:
+        raise ValueError(
+            f"Comparator backend '{backend}' is not available. "
+            f"Please use one from {COMPARE_BACKENDS}"
+        )
+
+    if backend == "recordlinkage":
+        return backend
+    if process is None:
+        if method == "token_set":
+            raise ValueError(
+                "Token set similarity requires rapidfuzz. Install it with "
+                "'pip install asreview-preprocess[rapidfuzz]'"
+            )
+        if backend == "rapidfuzz":
+            logging.warning(
+                "rapidfuzz is not installed, recordlinkage will be used for "
+                "computing similarity features."
+            )
+        return "recordlinkage"
+    if backend == "auto" and method not in _get_rapidfuzz_scorers():
+        return "recordlinkage"
+
+    return "rapidfuzz"
+
+
+def _get_rapidfuzz_scorers():
+    """Get rapidfuzz scorers and the scale of their scores by method"""
+    return {
+        "jarowinkler": (JaroWinkler.normalized_similarity, 1),
+        "levenshtein": (Levenshtein.normalized_similarity, 1),
+        "token_set": (fuzz.token_set_ratio, 100),
+    }
+
+
+def _compute_features_rapidfuzz(
+    candidate_pairs, data_df, col_specs, method="jarowinkler", workers=1
+):
+    """Calculate similarity features with rapidfuzz, comparing the whole
+    arrays of string pairs of a column in a single call"""
+    try:
+        scorer, scale = _get_rapidfuzz_scorers()[method]
+    except KeyError:
+        raise ValueError(
+            f"The method '{method}' is not available for the rapidfuzz backend. "
+            f"Please use one from {list(_get_rapidfuzz_scorers())}"
+        )
+
+    positions1 = data_df.index.get_indexer(candidate_pairs.get_level_values(0))
+    positions2 = data_df.index.get_indexer(candidate_pairs.get_level_values(1))
+
+    features = pd.DataFrame(index=candidate_pairs)
+    for col in COLS_FOR_DEDUPE:
+        values = data_df[col_specs[col]]
+        missing = values.isna().to_numpy()
+        strings = values.fillna("").astype(str).to_numpy(dtype=object)
+
+        strings1, strings2 = strings[positions1], strings[positions2]
+        similarity = process.cpdist(
+            strings1,
+            strings2,
+            scorer=scorer,
+            dtype=np.float64,
+            workers=workers,
+        )
+        similarity = similarity / scale
+
+        # Same values as recordlinkage for missing values (0) and for pairs
+        # of empty strings (0)
+        similarity[
+            missing[positions1]
+            | missing[positions2]
+            | ((strings1 == "") & (strings2 == ""))
+        ] = 0.0
+        features[col] = similarity
+
+    return features
+
+
+def compute_features(
+    candidate_pairs, data_df, col_specs, method="jarowinkler", backend="auto"
+):
+    """Calculate similarity features for all columns used for deduplication
+    of the candidate pairs
+
+    With the rapidfuzz backend, similarities of all pairs of a column are
+    computed in one call of compiled code, giving the same features as the
+    per-pair recordlinkage comparison."""
+    if _get_backend(backend, method) == "rapidfuzz":
+        return _compute_features_rapidfuzz(
+            candidate_pairs, data_df, col_specs, method=method
+        )
+
+    compare_cl = recordlinkage.Compare()
+    for col in COLS_FOR_DEDUPE:
+        compare_cl.string(col_specs[col], col_specs[col], method=method, label=col)
+
+    return compare_cl.compute(candidate_pairs, data_df)
+
+
+def get_feature_executor(data_df, col_specs, n_jobs=1):
+    """Get a pool of processes sharing the dataset for computing similarity
+    features of many batches of candidate pairs with
+    `compute_features_parallel`, None if `n_jobs` is 1
+
+    The dataset is sent to every process once when it starts, so it must
+    not change while the pool is used. The pool should be shut down after
+    use."""
+    n_jobs = _get_n_jobs(n_jobs)
+    if n_jobs == 1:
+        return None
+
+    data_df = data_df[[col_specs[col] for col in COLS_FOR_DEDUPE]]
+    return ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=_init_worker,
+        initargs=(data_df, col_specs),
+    )
+
+
+def compute_features_parallel(
+    candidate_pairs,
+    data_df,
+    col_specs,
+    method="jarowinkler",
+    n_jobs=1,
+    chunk_size=50000,
+    backend="auto",
+    executor=None,
+):
+    """Calculate similarity features of the candidate pairs in chunks
+    using a pool of processes
+
+    Parameters
+    ----------
+    candidate_pairs : pd.MultiIndex
+        Candidate pairs of record_ids
+    data_df : pd.DataFrame
+        Dataset with the cleaned columns used for deduplication
+    col_specs : dict
+        Column specification of the dataset
+    method : str, optional
+        String similarity method, by default "jarowinkler"
+    n_jobs : int, optional
+        Number of processes, by default 1. If -1, all cores are used.
+    chunk_size : int, optional
+        Number of candidate pairs per chunk, by default 50000
+    backend : str, optional
+        Comparator backend, either "rapidfuzz", "recordlinkage" or "auto"
+        for rapidfuzz if it is installed, by default "auto"
+    executor : concurrent.futures.ProcessPoolExecutor, optional
+        Pool of processes sharing `data_df` from `get_feature_executor`,
+        reused for many batches of candidate pairs. By default None (a
+        pool is started for this call)
+
+    Returns
+    -------
+    pd.DataFrame
+        Similarity features of the candidate pairs, in the same order as
+        `candidate_pairs`
+    """
+    n_jobs = _get_n_jobs(n_jobs)
+    backend = _get_backend(backend, method)
+
+    # rapidfuzz releases the GIL and compares in parallel threads itself
+    if backend == "rapidfuzz":
+        return _compute_features_rapidfuzz(
+            candidate_pairs, data_df, col_specs, method=method, workers=n_jobs
+        )
+
+    if n_jobs == 1 or len(candidate_pairs) <= chunk_size:
+        return compute_features(
+            candidate_pairs, data_df, col_specs, method=method, backend=backend
+        )
+
+    chunks = [
+        candidate_pairs[start : start + chunk_size]
+        for start in range(0, len(candidate_pairs), chunk_size)
+    ]
+
+    # Executor.map returns the results in the order of the chunks
+    if executor is not None:
+        features = executor.map(_compute_chunk, chunks, repeat(method), repeat(backend))
+        return pd.concat(list(features))
+
+    with get_feature_executor(data_df, col_specs, n_jobs=n_jobs) as executor:
+        features = executor.map(_compute_chunk, chunks, repeat(method), repeat(backend))
+        return pd.concat(list(features))
@@ -2,7 +2,10 @@ import csv
 import logging
 import os
 import re
+from bisect import bisect_left
+from functools import lru_cache
 
+from asreviewcontrib.preprocess.deduplication.journal_index import JournalIndex
 from unidecode import unidecode
 
 HTML_ENTITIES = [
@@ -22,25 +25,77 @@ HTML_ENTITIES = [
     "&reg;",
 ]
 
+# Tokens of author strings: runs of letters and whitespace, whitespace and
+# the ends of last names (a capitalised word followed by an optional comma,
+# whitespace and the first initial)
+AUTHOR_NAME_RUN = re.compile(r"[A-Za-z\s]*")
+AUTHOR_WHITESPACE = re.compile(r"\s")
+AUTHOR_LAST_NAME_END = re.compile(r"(?=([A-Z][a-z]+),?\s+([A-Z]))")
+
 # Dictionary of journal name abbreviations and full forms
 journal_abbr_filepath = os.path.join(
     os.path.dirname(__file__), "all_journal_abbreviations.csv"
 )
+_journal_abbr = None
+_journal_index = None
+
+
+def _read_journal_abbreviations():
+    with open(journal_abbr_filepath, "r") as f:
+        reader = csv.reader(f)
+        journal_abbr = {}
+
+        for row in reader:
+            journal_abbr[row[0]] = row[1].encode("ascii", "ignore").decode()
+        # TODO: Create SQL database or API of journal abbreviations
+
+    return journal_abbr
+
 
-with open(journal_abbr_filepath, "r") as f:
-    reader = csv.reader(f)
-    all_journal_abbr = {}
+def get_journal_abbreviations():
+    """Get dictionary of journal name abbreviations and full forms, read
+    from the CSV file on first use"""
+    global _journal_abbr
+    if _journal_abbr is None:
+        _journal_abbr = _read_journal_abbreviations()
+    return _journal_abbr
 
-    for row in reader:
-        all_journal_abbr[row[0]] = row[1].encode("ascii", "ignore").decode()
-    # TODO: Create SQL database or API of journal abbreviations
+
+def get_journal_index():
+    """Get trigram index of the journal abbreviations, built on first use"""
+    global _journal_index
+    if _journal_index is None:
+        _journal_index = JournalIndex(get_journal_abbreviations())
+    return _journal_index
+
+
+@lru_cache(maxsize=100000)
+def resolve_journal(journal):
+    """Get the full form of an approximate journal name, None if it does not
+    match any journal. Results are memoised per journal name."""
+    return get_journal_index().resolve(journal)
+
+
+def __getattr__(name):
+    # Keep 'all_journal_abbr' available without loading it at import
+    if name == "all_journal_abbr":
+        return get_journal_abbreviations()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _normalise_journal(journal):
+    """Normalise journal name to the key of the abbreviation dictionary"""
+    journal = journal.encode("ascii", "ignore").decode("ascii")
+    # TODO: Handle Accents better
+    return re.sub(r"[^a-zA-Z0-9\s]", "", journal)
 
 
 # Clean different fields to unify them to a common format
 def clean_title(title):
     for entity in HTML_ENTITIES:
         title = re.sub(f"{entity}", " ", title)
-    title = unidecode(title)
+    if not title.isascii():
+        title = unidecode(title)
     title = re.sub(r"[^A-Za-z0-9]", " ", title)
     title = re.sub(r" +", " ", title).strip().upper()
     return title
@@ -49,7 +104,8 @@ def clean_title(title):
 def clean_abstract(abstract):
     for entity in HTML_ENTITIES:
         abstract = re.sub(f"{entity}", " ", abstract)
-    abstract = unidecode(abstract)
+    if not abstract.isascii():
+        abstract = unidecode(abstract)
     abstract = re.sub(r"[^A-Za-z0-9]", " ", abstract)
     abstract = re.sub(r" +", " ", abstract).strip().upper()
     # Remove copywrite information
@@ -66,10 +122,10 @@ def clean_year(year):
 def clean_doi(doi):
     """unify DOIs to a common format https://doi.org/{doi}"""
     if len(doi) > 0:
-        doi = re.findall(r"(10\..+)", doi)
-        if len(doi) > 0:
-            return f"https://doi.org/{doi[0].strip().upper()}"
-    return doi
+        found = re.findall(r"(10\..+)", doi)
+        if len(found) > 0:
+            return f"https://doi.org/{found[0].strip().upper()}"
+    return ""
 
 
 def clean_pages(pages):
@@ -93,30 +149,94 @@ def clean_pages(pages):
 
 def clean_journal(journal):
     """Expand abbreviated journal names"""
-    preprocess_journal = journal.encode("ascii", "ignore").decode("ascii")
-    preprocess_journal = re.sub(r"[^a-zA-Z0-9\s]", "", preprocess_journal)
-    # TODO: Handle Accents better
-
     try:
-        return all_journal_abbr[preprocess_journal]
+        return get_journal_abbreviations()[_normalise_journal(journal)]
     except KeyError:
         return journal
 
 
+def clean_journal_fuzzy(journal):
+    """Expand abbreviated journal names, resolving approximate names such
+    as names with different case, punctuation or abbreviations"""
+    try:
+        return get_journal_abbreviations()[_normalise_journal(journal)]
+    except KeyError:
+        pass
+
+    full_form = resolve_journal(journal)
+    return full_form if full_form is not None else journal
+
+
 def clean_authors(authors):
     """Unify author names to a common format."""
-    authors = unidecode(authors)
-    matches = re.finditer(
-        r"\s?(?P<last>([A-Z]?[a-z]*\s?)*-?[A-Z][a-z]+),?\s+(?P<first>[A-Z])(?P<full>[a-z])?.?\s?(?P<middle>[A-Z])?.?",
-        authors.replace('"', ""),
-    )
-    authors = " ".join(
-        f"{match.group('last')} {match.group('first')} {match.group('middle')}"
-        if match.group("middle")
-        else f"{match.group('last')} {match.group('first')}"
-        for match in matches
-    )
-    return authors
+    return parse_authors(authors)[0]
+
+
+@lru_cache(maxsize=100000)
+def parse_authors(authors):
+    r"""Parse author names into the common format of `clean_authors` and the
+    first author key of `_get_first_author` in one pass
+
+    The names are the same as the matches of the regular expression
+    `\s?(?P<last>([A-Z]?[a-z]*\s?)*-?[A-Z][a-z]+),?\s+(?P<first>[A-Z])
+    (?P<full>[a-z])?.?\s?(?P<middle>[A-Z])?.?`, but found in linear time:
+    its first group matches any run of letters and whitespace, so a last
+    name ends at the last capitalised word of the run that is followed by
+    a first initial, instead of backtracking over all splits of the run.
+
+    Returns
+    -------
+    tuple
+        tuple of:
+        cleaned authors and first author key
+    """
+    text = authors if authors.isascii() else unidecode(authors)
+    text = text.replace('"', "")
+    n_chars = len(text)
+    last_name_ends = {
+        match.start(): match for match in AUTHOR_LAST_NAME_END.finditer(text)
+    }
+    starts = sorted(last_name_ends)
+
+    names = []
+    pos = 0
+    while pos < n_chars:
+        start = pos + 1 if AUTHOR_WHITESPACE.match(text, pos) else pos
+        run_end = AUTHOR_NAME_RUN.match(text, start).end()
+
+        # Longest last name from start, possibly hyphenated after the run
+        end = None
+        if text.startswith("-", run_end) and run_end + 1 in last_name_ends:
+            end = last_name_ends[run_end + 1]
+        else:
+            i = bisect_left(starts, run_end) - 1
+            if i >= 0 and starts[i] >= start:
+                end = last_name_ends[starts[i]]
+        if end is None:
+            pos = run_end + 1
+            continue
+
+        last = text[start : end.end(1)]
+        first = text[end.start(2)]
+        pos = end.start(2) + 1
+        if pos < n_chars and "a" <= text[pos] <= "z":
+            pos += 1
+        if pos < n_chars and text[pos] != "\n":
+            pos += 1
+        if pos < n_chars and AUTHOR_WHITESPACE.match(text, pos):
+            pos += 1
+        middle = None
+        if pos < n_chars and "A" <= text[pos] <= "Z":
+            middle = text[pos]
+            pos += 1
+        if pos < n_chars and text[pos] != "\n":
+            pos += 1
+
+        names.append(f"{last} {first} {middle}" if middle else f"{last} {first}")
+
+    if not names:
+        return "", ""
+    return " ".join(names), _first_author_key(names[0].split())
 
 
 def clean_volume(volume):
@@ -138,8 +258,13 @@ def clean_isbn(isbn):
 
 
 def _get_first_author(authors):
+    return _first_author_key(authors.split())
+
+
+def _first_author_key(items):
+    """Join the items of the cleaned authors before the first initial"""
     first_author = []
-    for item in authors.split():
+    for item in items:
         if len(item) == 1:
             break
         first_author.append(item)
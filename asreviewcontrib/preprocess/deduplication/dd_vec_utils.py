@@ -0,0 +1,126 @@
+import re
+
+import numpy as np
+import pandas as pd
+from asreviewcontrib.preprocess.deduplication import dd_utils
+from unidecode import unidecode
+
+# Single alternation of all HTML entities, replaced in one pass
+HTML_ENTITIES_REGEX = re.compile("|".join(dd_utils.HTML_ENTITIES))
+
+DOI_REGEX = re.compile(r"(10\..+)")
+DATE_REGEX = re.compile(r"\d{2}-\d{2}-\d{4}")
+PAGES_REGEX = re.compile(r"^(?P<start>\d*)-?(?P<end>\d*)")
+
+
+_is_ascii = np.frompyfunc(str.isascii, 1, 1)
+
+
+def is_ascii(values):
+    """Check which values of a series of strings are pure ASCII"""
+    return pd.Series(
+        _is_ascii(values.to_numpy(dtype=object)).astype(bool), index=values.index
+    )
+
+
+def transliterate(values):
+    """Transliterate only the non-ASCII values with unidecode"""
+    non_ascii = ~is_ascii(values)
+    if non_ascii.any():
+        values = values.copy()
+        values[non_ascii] = values[non_ascii].map(unidecode)
+    return values
+
+
+# Clean columns of the dataset with vectorised string operations, giving the
+# same values as the functions in dd_utils applied to every value
+def clean_title(titles):
+    titles = titles.str.replace(HTML_ENTITIES_REGEX, " ", regex=True)
+    titles = transliterate(titles)
+    titles = titles.str.replace(r"[^A-Za-z0-9]+", " ", regex=True)
+    return titles.str.strip().str.upper()
+
+
+def clean_abstract(abstracts):
+    return clean_title(abstracts)
+
+
+def clean_year(years):
+    """Unify year to a common format."""
+    return years
+
+
+def clean_doi(dois):
+    """unify DOIs to a common format https://doi.org/{doi}"""
+    found = dois.str.extract(DOI_REGEX, expand=False)
+    return ("https://doi.org/" + found.str.strip().str.upper()).fillna("")
+
+
+def clean_pages(pages):
+    """Unify page numbers to a common format.
+    Changes formats like 311-7 to 311-317."""
+    digits = pages.str.replace(r"[^0-9-]", "", regex=True)
+    parts = digits.str.extract(PAGES_REGEX)
+    start, end = parts["start"], parts["end"]
+
+    # Complete end pages shorter than start pages with the leading digits of
+    # the start pages
+    len_diff = start.str.len() - end.str.len()
+    short_end = (end.str.len() > 0) & (len_diff > 0)
+    end[short_end] = [
+        f"{s[:diff]}{e}"
+        for s, e, diff in zip(start[short_end], end[short_end], len_diff[short_end])
+    ]
+
+    cleaned = start.where(end.str.len() == 0, start + "-" + end)
+    # Checking if date is missfilled as pages in input dataset
+    cleaned[pages.str.contains(DATE_REGEX) | (pages.str.len() == 0)] = ""
+    return cleaned
+
+
+def _expand_journals(journals):
+    preprocess_journals = (
+        journals.str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.replace(r"[^a-zA-Z0-9\s]", "", regex=True)
+    )
+    return preprocess_journals.map(dd_utils.get_journal_abbreviations())
+
+
+def clean_journal(journals):
+    """Expand abbreviated journal names"""
+    expanded = _expand_journals(journals)
+    return expanded.where(expanded.notna(), journals)
+
+
+def clean_journal_fuzzy(journals):
+    """Expand abbreviated journal names, resolving approximate names such
+    as names with different case, punctuation or abbreviations"""
+    expanded = _expand_journals(journals)
+
+    # Resolve approximate names once per unique name
+    unresolved = expanded.isna()
+    if unresolved.any():
+        expanded[unresolved] = journals[unresolved].map(dd_utils.resolve_journal)
+    return expanded.where(expanded.notna(), journals)
+
+
+def clean_authors(authors):
+    """Unify author names to a common format."""
+    return authors.map(dd_utils.clean_authors)
+
+
+def clean_volume(volumes):
+    """Unify volume to a common format."""
+    return volumes.str.lower().str.replace("(no pagination)", "", regex=False)
+
+
+def clean_number(numbers):
+    """Unify number to a common format."""
+    return numbers
+
+
+def clean_isbn(isbns):
+    """Unify ISBNs/ISSNs to a common format."""
+    isbns = isbns.str.replace(r"\s\((Print|Electronic)\).*", "", regex=True)
+    return isbns.str.replace(r"\r", "; ", regex=False)
@@ -1,17 +1,31 @@
 import pandas as pd
-from asreviewcontrib.preprocess.data.load import load_data
+from asreviewcontrib.preprocess.data.load import load_data, load_datasets
 from asreviewcontrib.preprocess.utils import _deduplicator_class_from_entry_point
 
 
 def apply_dedup(
-    input_path, output_path, method="asr", pid="doi", drop_duplicates=False
+    input_path,
+    output_path,
+    method="asr",
+    pid="doi",
+    drop_duplicates=False,
+    indexing="block",
+    indexing_kwargs=None,
+    max_block_size=None,
+    block_policy="keep",
+    corpus_path=None,
+    n_jobs=1,
+    cross_source_only=False,
+    link=False,
+    cache_dir=None,
 ) -> pd.DataFrame:
     """Apply deduplication to remove duplicate records
 
     Parameters
     ----------
-    input_path: str
-        Path of the input dataset
+    input_path: str, list
+        Path of the input dataset, or list of paths of datasets which are
+        combined and deduplicated together
     output_path: str
         Path to save the deduplicated dataset
     method: str, optional
@@ -22,6 +36,40 @@ def apply_dedup(
     drop_duplicates : bool, optional
         Remove duplicate records from dataset, by default False
         if False, adds keep_remove column to dataset for indicating duplicates
+    indexing : str, optional
+        Indexing method for the blocking keys of the deduplication method
+        Available methods [block, minhash, sortedneighbourhood],
+        by default "block"
+    indexing_kwargs : dict, optional
+        Keyword arguments for the indexing method, e.g. n_bands and n_rows
+        for minhash or window for sortedneighbourhood
+    max_block_size : int, optional
+        Maximum number of records in a block of exact blocking or a bucket
+        of a MinHash LSH band, by default None
+    block_policy : str, optional
+        Policy for blocks larger than max_block_size
+        Available policies [keep, skip, split, subblock], by default "keep"
+    corpus_path : str, optional
+        Path of the index of an already deduplicated corpus. If given, only
+        the input records are deduplicated against the corpus and each other,
+        and they are added to the corpus. Not supported with block policies
+        other than "keep" or `cross_source_only`. By default None
+    n_jobs : int, optional
+        Number of processes used for loading multiple datasets, parsing
+        large Endnote XML files, cleaning records and computing similarity
+        features, by default 1. If -1, all cores are used.
+    cross_source_only : bool, optional
+        Only mark records from different input datasets as duplicates,
+        by default False
+    link : bool, optional
+        Link the second of two input datasets against the first one instead
+        of deduplicating them together. Only records of the second dataset
+        are saved, marked REMOVE if they are duplicates of records in the
+        first dataset. Can not be combined with `corpus_path` or
+        `cross_source_only`. By default False
+    cache_dir : str, optional
+        Directory of the cache of standardised input datasets, so that
+        unchanged datasets are not parsed again. By default None (no cache)
 
     Returns
     -------
@@ -29,9 +77,71 @@ def apply_dedup(
         Deduplicated dataset
     """
 
-    records_df, _ = load_data(input_path)
-    deduplicator = _deduplicator_class_from_entry_point(method)()
-    output_df = deduplicator.dedup(records_df, drop_duplicates=drop_duplicates)
+    if link and (not isinstance(input_path, (list, tuple)) or len(input_path) != 2):
+        raise ValueError("Linking requires exactly two input datasets")
+    if link and corpus_path:
+        raise ValueError(
+            "Linking can not be combined with incremental deduplication "
+            "against a corpus"
+        )
+    if link and cross_source_only:
+        raise ValueError(
+            "Linking only compares records of different datasets, "
+            "cross_source_only can not be combined with linking"
+        )
+
+    if indexing_kwargs is None:
+        indexing_kwargs = {}
+    deduplicator = _deduplicator_class_from_entry_point(method)(
+        indexing=indexing,
+        max_block_size=max_block_size,
+        block_policy=block_policy,
+        n_jobs=n_jobs,
+        cross_source_only=cross_source_only,
+        **indexing_kwargs,
+    )
+    # Check options before loading the datasets
+    if corpus_path:
+        deduplicator._check_incremental_options()
+
+    if link:
+        left_df, _ = load_data(input_path[0], n_jobs=n_jobs, cache_dir=cache_dir)
+        records_df, _ = load_data(input_path[1], n_jobs=n_jobs, cache_dir=cache_dir)
+    elif isinstance(input_path, (list, tuple)) and len(input_path) > 1:
+        records_df, _ = load_datasets(input_path, n_jobs=n_jobs, cache_dir=cache_dir)
+    else:
+        if isinstance(input_path, (list, tuple)):
+            input_path = input_path[0]
+        records_df, _ = load_data(input_path, n_jobs=n_jobs, cache_dir=cache_dir)
+    if link:
+        output_df = deduplicator.link(
+            left_df, records_df, drop_duplicates=drop_duplicates
+        )
+    elif corpus_path:
+        output_df = deduplicator.dedup_incremental(
+            records_df, corpus_path, drop_duplicates=drop_duplicates
+        )
+        print(f"Corpus index updated at {corpus_path}")
+    else:
+        output_df = deduplicator.dedup(records_df, drop_duplicates=drop_duplicates)
+    _print_block_plans(deduplicator.block_plans)
     output_df.to_csv(output_path)
     print(f"Deduplicated dataset saved to {output_path}")
     return output_df
+
+
+def _print_block_plans(block_plans):
+    """Print estimated number of candidate pairs and the action taken for
+    oversized blocks for every blocking column"""
+    for plan in block_plans:
+        print(
+            f"Blocking on '{plan['column']}': {plan['n_blocks']} blocks, "
+            f"{plan['n_pairs']} candidate pairs estimated"
+        )
+        if plan["policy"] is not None:
+            print(
+                f"  {len(plan['oversized'])} oversized blocks with "
+                f"{plan['n_oversized_pairs']} pairs (largest: "
+                f"{plan['oversized'].iloc[0]} records) -> '{plan['policy']}', "
+                f"{plan['n_pairs_after_policy']} candidate pairs after policy"
+            )
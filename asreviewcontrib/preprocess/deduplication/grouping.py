@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+def _union_find(n_nodes, left, right):
+    """Array based union-find over `n_nodes` nodes connected by the edges
+    (left[i], right[i]).
+
+    Every node points to a parent with a smaller or equal position, so the
+    forest stays acyclic while roots are hooked onto the smallest root they
+    are connected to. Paths are fully compressed after each round of hooking.
+
+    Returns
+    -------
+    np.ndarray
+        Root (smallest node position) of the component of every node
+    """
+    parent = np.arange(n_nodes, dtype=np.int64)
+
+    while True:
+        root_left = parent[left]
+        root_right = parent[right]
+        mask = root_left != root_right
+        if not mask.any():
+            break
+        low = np.minimum(root_left[mask], root_right[mask])
+        high = np.maximum(root_left[mask], root_right[mask])
+        np.minimum.at(parent, high, low)
+
+        # Pointer jumping until every node points directly to its root
+        while True:
+            grand_parent = parent[parent]
+            if np.array_equal(grand_parent, parent):
+                break
+            parent = grand_parent
+
+    return parent
+
+
+def get_group_labels(pair_rids, record_ids):
+    """Get duplicate group label for every record from pairs of duplicates
+
+    Parameters
+    ----------
+    pair_rids : np.ndarray
+        Integer array of shape (n_pairs, 2) with record_ids of duplicate pairs
+    record_ids : array-like
+        record_ids of all the records in the dataset
+
+    Returns
+    -------
+    np.ndarray
+        Group label aligned with `record_ids`. Records without duplicates get
+        label 0, groups of duplicates are labelled 1, 2, ... in order of their
+        first record in `record_ids`.
+    """
+    record_ids = pd.Index(record_ids)
+    labels = np.zeros(len(record_ids), dtype=np.int64)
+
+    pair_rids = np.asarray(pair_rids).reshape(-1, 2)
+    if len(pair_rids) == 0:
+        return labels
+
+    left = record_ids.get_indexer(pair_rids[:, 0])
+    right = record_ids.get_indexer(pair_rids[:, 1])
+    valid = (left >= 0) & (right >= 0)
+    left, right = left[valid], right[valid]
+
+    roots = _union_find(len(record_ids), left, right)
+
+    in_pair = np.zeros(len(record_ids), dtype=bool)
+    in_pair[left] = True
+    in_pair[right] = True
+    _, group_ids = np.unique(roots[in_pair], return_inverse=True)
+    labels[in_pair] = group_ids.ravel() + 1
+
+    return labels
+
+
+def get_groups_from_labels(labels, record_ids):
+    """Get groups of duplicate record_ids as sorted tuples from group labels"""
+    record_ids = np.asarray(record_ids)
+    labels = np.asarray(labels)
+
+    mask = labels > 0
+    if not mask.any():
+        return []
+
+    order = np.lexsort((record_ids[mask], labels[mask]))
+    sorted_labels = labels[mask][order]
+    sorted_rids = record_ids[mask][order]
+    boundaries = np.flatnonzero(np.diff(sorted_labels)) + 1
+
+    return [tuple(group.tolist()) for group in np.split(sorted_rids, boundaries)]
@@ -0,0 +1,136 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from asreviewcontrib.preprocess.deduplication import indexing
+
+
+def _key_hashes(keys):
+    """Hash blocking keys of any type to UInt64, keeping missing keys"""
+    return indexing.hash_strings(keys.astype("string"))
+
+
+class CorpusIndex:
+    """Blocking-key index and cleaned columns of an already deduplicated
+    corpus, persisted on disk for incremental deduplication
+
+    For every record the representative record_id of its duplicate group
+    (the smallest record_id in the group) is kept. For every blocking column
+    the sorted unique key hashes are kept together with the representative
+    of the group having that key, so that new records can be matched by
+    binary search without comparing the corpus with itself again.
+
+    Parameters
+    ----------
+    method : str
+        Name of the deduplication method used for the corpus
+    data_df : pd.DataFrame
+        Cleaned columns of the corpus indexed by record_id
+    group_reps : pd.Series
+        Representative record_id of the duplicate group of every record
+    key_index : dict
+        Sorted key hashes and representatives for every blocking column
+    """
+
+    def __init__(self, method, data_df, group_reps, key_index):
+        self.method = method
+        self.data_df = data_df
+        self.group_reps = group_reps
+        self.key_index = key_index
+
+    @classmethod
+    def build(cls, method, data_df, cols, group_reps):
+        """Build index of a deduplicated corpus from its blocking columns"""
+        corpus = cls(method, data_df.iloc[:0], group_reps.iloc[:0], {})
+        corpus.add_records(data_df, cols, group_reps)
+        return corpus
+
+    @classmethod
+    def load(cls, path):
+        return cls(**pd.read_pickle(path))
+
+    def save(self, path):
+        """Save the corpus through a temporary file in the same directory, so
+        that the corpus at `path` is never partially written"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Same file name ending, so that the compression is inferred alike
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=".tmp", suffix=os.path.basename(path)
+        )
+        os.close(fd)
+        try:
+            pd.to_pickle(self.__dict__, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @property
+    def next_record_id(self):
+        if len(self.group_reps) == 0:
+            return 0
+        return int(self.group_reps.index.max()) + 1
+
+    def lookup(self, col, keys):
+        """Get representative record_id of the corpus group with the same
+        key for every key, -1 if the key is missing or not in the corpus"""
+        reps = np.full(len(keys), -1, dtype=np.int64)
+        index_keys, index_reps = self.key_index.get(col, (np.empty(0), None))
+        if len(index_keys) == 0:
+            return reps
+
+        hashes = _key_hashes(keys)
+        present = hashes.notna().to_numpy()
+        values = hashes[present].to_numpy(dtype=np.uint64)
+
+        positions = np.searchsorted(index_keys, values)
+        positions = np.minimum(positions, len(index_keys) - 1)
+        found = index_keys[positions] == values
+        reps[np.flatnonzero(present)[found]] = index_reps[positions[found]]
+
+        return reps
+
+    def merge_groups(self, rep_mapping):
+        """Update representatives of corpus groups that are merged
+
+        Parameters
+        ----------
+        rep_mapping : pd.Series
+            New representative record_id indexed by the old one
+        """
+        rep_mapping = rep_mapping[rep_mapping.index != rep_mapping.values]
+        if len(rep_mapping) == 0:
+            return
+
+        reps = self.group_reps.to_numpy()
+        changed = np.isin(reps, rep_mapping.index)
+        reps[changed] = rep_mapping.loc[reps[changed]].to_numpy()
+        self.group_reps = pd.Series(reps, index=self.group_reps.index)
+
+        for col, (index_keys, index_reps) in self.key_index.items():
+            changed = np.isin(index_reps, rep_mapping.index)
+            index_reps = index_reps.copy()
+            index_reps[changed] = rep_mapping.loc[index_reps[changed]].to_numpy()
+            self.key_index[col] = (index_keys, index_reps)
+
+    def add_records(self, data_df, cols, group_reps):
+        """Add cleaned records with their blocking columns and group
+        representatives to the corpus"""
+        self.data_df = pd.concat([self.data_df, data_df])
+        self.group_reps = pd.concat([self.group_reps, group_reps])
+
+        for col in cols:
+            hashes = _key_hashes(data_df[col])
+            present = hashes.notna().to_numpy()
+            new_keys = hashes[present].to_numpy(dtype=np.uint64)
+            new_reps = group_reps.to_numpy()[present]
+
+            index_keys, index_reps = self.key_index.get(
+                col, (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+            )
+            keys = np.concatenate([index_keys, new_keys])
+            reps = np.concatenate([index_reps, new_reps])
+            keys, first = np.unique(keys, return_index=True)
+            self.key_index[col] = (keys, reps[first])
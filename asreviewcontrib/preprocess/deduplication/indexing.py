@@ -0,0 +1,559 @@
+import numpy as np
+import pandas as pd
+import recordlinkage
+from recordlinkage.base import BaseIndexAlgorithm
+
+
+def hash_strings(strings):
+    """Hash strings to fixed width 64-bit blocking keys
+
+    Parameters
+    ----------
+    strings : pd.Series
+        Series of (normalised) strings
+
+    Returns
+    -------
+    pd.Series
+        Series of nullable UInt64 hashes with the same index as `strings`.
+        Empty or missing strings are hashed to missing values so that they
+        are never matched while blocking.
+    """
+    strings = strings.fillna("").astype(str)
+    hashes = pd.util.hash_array(strings.to_numpy(dtype=object), categorize=True)
+    missing = (strings.str.len() == 0).to_numpy()
+
+    return pd.Series(
+        pd.arrays.IntegerArray(hashes, missing), index=strings.index, dtype="UInt64"
+    )
+
+
+def plan_blocks(keys, max_block_size=None, n_left=None):
+    """Estimate the number of candidate pairs of blocking on keys from the
+    histogram of block sizes, before any pairs are materialised
+
+    Parameters
+    ----------
+    keys : pd.Series
+        Blocking keys, missing keys are never paired
+    max_block_size : int, optional
+        Blocks with more records are reported as oversized, by default None
+    n_left : int, optional
+        If given, only pairs of one of the first `n_left` records with one
+        of the other records are counted, as for linking two datasets,
+        by default None
+
+    Returns
+    -------
+    dict
+        Number of blocks and estimated number of pairs, and the sizes of
+        the oversized blocks with their number of pairs
+    """
+    block_sizes = keys.value_counts(dropna=True)
+    if n_left is None:
+        n_pairs = block_sizes * (block_sizes - 1) // 2
+    else:
+        left_sizes = keys.iloc[:n_left].value_counts(dropna=True)
+        left_sizes = left_sizes.reindex(block_sizes.index, fill_value=0)
+        n_pairs = left_sizes * (block_sizes - left_sizes)
+    block_sizes = block_sizes[n_pairs > 0]
+    n_pairs = n_pairs[n_pairs > 0]
+
+    if max_block_size is None:
+        oversized = block_sizes.iloc[:0]
+    else:
+        oversized = block_sizes[block_sizes > max_block_size]
+
+    return {
+        "n_blocks": len(block_sizes),
+        "n_pairs": int(n_pairs.sum()),
+        "oversized": oversized,
+        "n_oversized_pairs": int(n_pairs[oversized.index].sum()),
+    }
+
+
+def apply_block_policy(keys, oversized, policy, max_block_size, subblock_keys=None):
+    """Handle the records of oversized blocks according to the policy
+
+    Parameters
+    ----------
+    keys : pd.Series
+        Blocking keys
+    oversized : pd.Series
+        Sizes of the oversized blocks indexed by their key
+    policy : str
+        "keep" the blocks as they are, "skip" the blocks, "split" the
+        blocks in record order into sub-blocks of at most `max_block_size`
+        records, or "subblock" the blocks on `subblock_keys`
+    max_block_size : int
+        Maximum number of records in a block
+    subblock_keys : pd.Series, optional
+        Secondary keys for the "subblock" policy, records with missing or
+        empty secondary keys are not paired
+
+    Returns
+    -------
+    pd.Series
+        Blocking keys, hashed to UInt64 if any keys were changed
+    """
+    if policy == "keep" or len(oversized) == 0:
+        return keys
+
+    in_oversized = keys.isin(oversized.index).to_numpy()
+    if policy == "skip":
+        return keys.mask(in_oversized)
+
+    keys = keys.astype("string")
+    if policy == "split":
+        sub_keys = keys[in_oversized].groupby(keys[in_oversized]).cumcount()
+        sub_keys = (sub_keys // max_block_size).astype("string")
+    elif policy == "subblock":
+        sub_keys = subblock_keys[in_oversized].fillna("").astype("string")
+        sub_keys = sub_keys.mask(sub_keys.str.strip().str.len() == 0)
+    else:
+        raise ValueError(f"Block policy '{policy}' is not available.")
+
+    keys[in_oversized] = keys[in_oversized] + "\x1f" + sub_keys
+
+    return hash_strings(keys)
+
+
+def _pairs_in_runs(members, run_lengths):
+    """Get all pairs of members within consecutive runs of the given lengths
+
+    Members are expected to be in ascending order within every run, pairs
+    are returned as (larger member, smaller member).
+    """
+    run_end = np.repeat(np.cumsum(run_lengths), run_lengths)
+
+    first = np.flatnonzero(run_end - np.arange(len(members)) > 1)
+    pairs = []
+    distance = 1
+    while len(first):
+        pairs.append(np.stack([members[first + distance], members[first]], axis=1))
+        distance += 1
+        first = first[first + distance < run_end[first]]
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+
+    return np.concatenate(pairs)
+
+
+def _iter_large_block_pairs(members, batch_size):
+    """Yield all pairs of members of a single block in batches of at most
+    `batch_size` pairs (or one row of pairs if that is larger)"""
+    n_pairs_before_row = np.arange(len(members) + 1) * np.arange(-1, len(members)) // 2
+
+    row = 1
+    while row < len(members):
+        end = np.searchsorted(
+            n_pairs_before_row, n_pairs_before_row[row] + batch_size, side="right"
+        )
+        end = min(max(end - 1, row + 1), len(members))
+
+        rows = np.arange(row, end)
+        first = np.repeat(rows, rows)
+        second = np.arange(len(first)) - np.repeat(np.cumsum(rows) - rows, rows)
+        yield np.stack([members[first], members[second]], axis=1)
+
+        row = end
+
+
+def iter_block_pairs(keys, batch_size=1000000):
+    """Yield pairs of positions of records with equal blocking keys in
+    batches, without materialising all candidate pairs at once
+
+    Parameters
+    ----------
+    keys : pd.Series
+        Blocking keys, missing keys are never paired
+    batch_size : int, optional
+        Maximum number of pairs per batch, by default 1000000
+
+    Yields
+    ------
+    np.ndarray
+        Integer array of shape (n_pairs, 2) with (larger, smaller) positions
+    """
+    codes, _ = pd.factorize(keys)
+    positions = np.flatnonzero(codes >= 0)
+    order = positions[np.argsort(codes[positions], kind="stable")]
+    sorted_codes = codes[order]
+
+    run_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, len(order)])
+
+    # Only blocks of at least two records give pairs
+    in_block = np.repeat(run_lengths > 1, run_lengths)
+    members = order[in_block]
+    run_lengths = run_lengths[run_lengths > 1]
+    run_offsets = np.r_[0, np.cumsum(run_lengths)]
+    cum_pairs = np.cumsum(run_lengths * (run_lengths - 1) // 2)
+
+    start = 0
+    while start < len(run_lengths):
+        pairs_before = cum_pairs[start - 1] if start else 0
+        if cum_pairs[start] - pairs_before > batch_size:
+            yield from _iter_large_block_pairs(
+                members[run_offsets[start] : run_offsets[start + 1]], batch_size
+            )
+            start += 1
+            continue
+
+        # Consecutive blocks with at most batch_size pairs in total
+        end = np.searchsorted(cum_pairs, pairs_before + batch_size, side="right")
+        yield _pairs_in_runs(
+            members[run_offsets[start] : run_offsets[end]], run_lengths[start:end]
+        )
+        start = end
+
+
+def iter_link_block_pairs(keys, n_left, batch_size=1000000):
+    """Yield pairs of positions of one of the first `n_left` records and one
+    of the other records with equal blocking keys in batches, without
+    materialising all candidate pairs at once
+
+    Parameters
+    ----------
+    keys : pd.Series
+        Blocking keys of the left records followed by the right records,
+        missing keys are never paired
+    n_left : int
+        Number of left records
+    batch_size : int, optional
+        Maximum number of pairs per batch, by default 1000000
+
+    Yields
+    ------
+    np.ndarray
+        Integer array of shape (n_pairs, 2) with (right, left) positions
+    """
+    codes, uniques = pd.factorize(keys)
+    sides = []
+    for side_codes, offset in ((codes[:n_left], 0), (codes[n_left:], n_left)):
+        positions = np.flatnonzero(side_codes >= 0)
+        order = positions[np.argsort(side_codes[positions], kind="stable")]
+        sizes = np.bincount(side_codes[positions], minlength=len(uniques))
+        sides.append((order + offset, sizes, np.cumsum(sizes) - sizes))
+    (left, left_sizes, left_starts), (right, right_sizes, right_starts) = sides
+
+    # Pairs are numbered block by block, left record by left record
+    n_pairs = left_sizes * right_sizes
+    blocks = np.flatnonzero(n_pairs)
+    cum_pairs = np.cumsum(n_pairs[blocks])
+    total_pairs = cum_pairs[-1] if len(blocks) else 0
+
+    for start in range(0, total_pairs, batch_size):
+        pair_ids = np.arange(start, min(start + batch_size, total_pairs))
+        block_ids = np.searchsorted(cum_pairs, pair_ids, side="right")
+        block = blocks[block_ids]
+        in_block = pair_ids - (cum_pairs[block_ids] - n_pairs[block])
+        left_pos = left[left_starts[block] + in_block // right_sizes[block]]
+        right_pos = right[right_starts[block] + in_block % right_sizes[block]]
+        yield np.stack([right_pos, left_pos], axis=1)
+
+
+class MinHashLSH(BaseIndexAlgorithm):
+    """Make candidate record pairs of near-duplicate texts using MinHash
+    signatures and Locality Sensitive Hashing (LSH)
+
+    Texts are split into character shingles and a MinHash signature of
+    `n_bands * n_rows` values is computed for every record in batches.
+    Records sharing all `n_rows` values of any band become candidate pairs,
+    which makes pairs with Jaccard similarity above roughly
+    `(1 / n_bands) ** (1 / n_rows)` likely to be found.
+
+    Parameters
+    ----------
+    left_on : str
+        Column with (cleaned) text to index on
+    n_bands : int, optional
+        Number of LSH bands, by default 16
+    n_rows : int, optional
+        Number of signature values per band, by default 8
+    shingle_size : int, optional
+        Number of characters per shingle, by default 5
+    threshold : float, optional
+        Minimum Jaccard similarity estimated from the signatures for
+        candidate pairs to be kept, by default 0.8. If None, all candidate
+        pairs found by LSH are kept.
+    batch_size : int, optional
+        Number of records shingled at once, bounding peak memory,
+        by default 2000
+    seed : int, optional
+        Seed for the hash functions, by default 0
+    """
+
+    def __init__(
+        self,
+        left_on,
+        n_bands=16,
+        n_rows=8,
+        shingle_size=5,
+        threshold=0.8,
+        batch_size=2000,
+        seed=0,
+        **kwargs,
+    ):
+        super(MinHashLSH, self).__init__(**kwargs)
+        self.left_on = left_on
+        self.n_bands = n_bands
+        self.n_rows = n_rows
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.seed = seed
+
+        # Multiply-shift hash functions (a * x + b) >> 32 with odd a
+        rng = np.random.default_rng(seed)
+        n_hashes = n_bands * n_rows
+        self._a = rng.integers(1, 2**63, n_hashes, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, n_hashes, dtype=np.uint64)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        return (
+            f"<{class_name} left_on={self.left_on!r}, n_bands={self.n_bands}, "
+            f"n_rows={self.n_rows}>"
+        )
+
+    def _shingle_hashes(self, texts):
+        """Get 64-bit hashes of all character shingles of the texts and the
+        position of the first shingle of every text"""
+        encoded = texts.str.pad(self.shingle_size, side="right").str.encode("utf-8")
+        lengths = encoded.str.len().to_numpy(dtype=np.int64)
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        # Polynomial rolling hash of all shingles in the buffer
+        n_shingles = len(buffer) - self.shingle_size + 1
+        hashes = np.zeros(n_shingles, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            hashes = (
+                hashes * np.uint64(1099511628211) + buffer[offset : offset + n_shingles]
+            )
+
+        # Only keep shingles that do not cross the boundary between texts
+        ends = np.cumsum(lengths)
+        owner = np.repeat(np.arange(len(lengths)), lengths)[:n_shingles]
+        valid = np.arange(n_shingles) + self.shingle_size <= ends[owner]
+        n_valid = lengths - self.shingle_size + 1
+        starts = np.concatenate(([0], np.cumsum(n_valid)[:-1]))
+
+        return hashes[valid], starts
+
+    def _signatures(self, texts):
+        """Compute LSH band keys and 8-bit MinHash signatures in batches"""
+        band_keys = np.empty((len(texts), self.n_bands), dtype=np.uint64)
+        signatures = np.empty((len(texts), self.n_bands * self.n_rows), np.uint8)
+
+        for batch_start in range(0, len(texts), self.batch_size):
+            batch = slice(batch_start, batch_start + self.batch_size)
+            shingles, starts = self._shingle_hashes(texts.iloc[batch])
+
+            minhashes = np.empty((len(starts), len(self._a)), dtype=np.uint32)
+            for i, (a, b) in enumerate(zip(self._a, self._b)):
+                values = ((shingles * a + b) >> np.uint64(32)).astype(np.uint32)
+                minhashes[:, i] = np.minimum.reduceat(values, starts)
+
+            keys = minhashes.reshape(len(starts), self.n_bands, self.n_rows)
+            band_key = np.zeros((len(starts), self.n_bands), dtype=np.uint64)
+            for row in range(self.n_rows):
+                band_key = band_key * np.uint64(1099511628211) ^ keys[:, :, row]
+
+            band_keys[batch] = band_key
+            signatures[batch] = minhashes.astype(np.uint8)
+
+        return band_keys, signatures
+
+    def lsh_keys(self, df):
+        """Get the LSH band keys and MinHash signatures of the records
+
+        Returns
+        -------
+        tuple
+            tuple of:
+            dataframe with the nullable UInt64 key of every band (missing
+            for records with missing or empty texts) indexed like `df`, and
+            the 8-bit signatures aligned with the rows of `df`
+        """
+        texts = self._texts(df)
+        positions = df.index.get_indexer(texts.index)
+        band_keys, text_signatures = self._signatures(texts)
+
+        keys = np.zeros((len(df), self.n_bands), dtype=np.uint64)
+        keys[positions] = band_keys
+        missing = np.ones(len(df), dtype=bool)
+        missing[positions] = False
+        signatures = np.zeros((len(df), text_signatures.shape[1]), dtype=np.uint8)
+        signatures[positions] = text_signatures
+
+        keys = pd.DataFrame(
+            {
+                band: pd.arrays.IntegerArray(keys[:, band], missing.copy())
+                for band in range(self.n_bands)
+            },
+            index=df.index,
+        )
+        return keys, signatures
+
+    def _filter_pairs(self, pairs, signatures):
+        """Only keep pairs with a Jaccard similarity estimated from the
+        signatures of at least `threshold`"""
+        if self.threshold is None or len(pairs) == 0:
+            return pairs
+
+        # Correct for the chance of 1/256 that two different 8-bit values agree
+        keep = np.zeros(len(pairs), dtype=bool)
+        for start in range(0, len(pairs), self.batch_size):
+            chunk = pairs[start : start + self.batch_size]
+            agreement = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(
+                axis=1
+            )
+            similarity = (agreement - 1 / 256) / (1 - 1 / 256)
+            keep[start : start + self.batch_size] = similarity >= self.threshold
+
+        return pairs[keep]
+
+    def iter_pairs(self, band_keys, signatures, batch_size=1000000, n_left=None):
+        """Yield candidate pairs of positions sharing a band key in batches,
+        every pair only once
+
+        The bands are blocked one after the other with `iter_block_pairs`,
+        so the pairs of large buckets are never materialised at once. Only
+        the pairs kept after thresholding are remembered for removing pairs
+        found again in later bands.
+
+        Parameters
+        ----------
+        band_keys : iterable
+            Series of the keys of every band, e.g. the columns of the keys
+            of `lsh_keys` after handling oversized buckets
+        signatures : np.ndarray
+            Signatures of `lsh_keys`
+        batch_size : int, optional
+            Maximum number of pairs per batch, by default 1000000
+        n_left : int, optional
+            If given, only pairs of one of the first `n_left` records with
+            one of the other records are yielded, by default None
+
+        Yields
+        ------
+        np.ndarray
+            Integer array of shape (n_pairs, 2) with (larger, smaller) positions
+        """
+        n_records = np.uint64(len(signatures))
+        found = np.empty(0, dtype=np.uint64)
+        for keys in band_keys:
+            # Pairs share at most one key per band, so pairs of a band are
+            # only checked against the pairs found in earlier bands
+            band_found = [found]
+            if n_left is None:
+                band_pairs = iter_block_pairs(keys, batch_size=batch_size)
+            else:
+                band_pairs = iter_link_block_pairs(keys, n_left, batch_size=batch_size)
+            for pairs in band_pairs:
+                codes = pairs[:, 0].astype(np.uint64) * n_records + pairs[:, 1]
+                if len(found):
+                    positions = np.searchsorted(found, codes)
+                    positions = np.minimum(positions, len(found) - 1)
+                    pairs = pairs[found[positions] != codes]
+                pairs = self._filter_pairs(pairs, signatures)
+                if len(pairs) == 0:
+                    continue
+
+                band_found.append(
+                    pairs[:, 0].astype(np.uint64) * n_records + pairs[:, 1]
+                )
+                yield pairs
+            found = np.sort(np.concatenate(band_found))
+
+    def _index_positions(self, df, n_left=None):
+        """Get all candidate pairs of positions of the records"""
+        keys, signatures = self.lsh_keys(df)
+        pairs = list(
+            self.iter_pairs((keys[band] for band in keys), signatures, n_left=n_left)
+        )
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+
+        return np.concatenate(pairs)
+
+    def _texts(self, df):
+        texts = df[self.left_on].dropna().astype(str)
+        return texts[texts.str.len() > 0]
+
+    def _dedup_index(self, df_a):
+        pairs = self._index_positions(df_a)
+
+        return pd.MultiIndex(
+            levels=[df_a.index.values, df_a.index.values],
+            codes=[pairs[:, 0], pairs[:, 1]],
+            verify_integrity=False,
+        )
+
+    def _link_index(self, df_a, df_b):
+        df = pd.concat([df_a[[self.left_on]], df_b[[self.left_on]]], ignore_index=True)
+        # Positions of df_b come after df_a, so the larger position of the
+        # pairs belongs to df_b
+        pairs = self._index_positions(df, n_left=len(df_a))
+
+        return pd.MultiIndex(
+            levels=[df_a.index.values, df_b.index.values],
+            codes=[pairs[:, 1], pairs[:, 0] - len(df_a)],
+            verify_integrity=False,
+        )
+
+
+class SortedNeighbourhood(recordlinkage.index.SortedNeighbourhood):
+    """Make candidate record pairs with the sorted neighbourhood algorithm
+    and verify them on the string similarity of their sorting keys
+
+    Records are sorted on the (cleaned) sorting key and paired with the
+    records whose keys are within `window` positions in the sorted order
+    of unique keys. Unlike blocking, near matches of the key are paired
+    while the number of pairs grows linearly with the number of records.
+
+    Parameters
+    ----------
+    left_on : str
+        Column with the sorting key
+    window : int, optional
+        Size of the sorted neighbourhood window, a positive odd integer,
+        by default 3
+    threshold : float, optional
+        Minimum string similarity of the sorting keys of candidate pairs,
+        by default 0.9. If None, all pairs in the window are kept.
+    method : str, optional
+        String similarity method of recordlinkage used for verifying
+        candidate pairs, by default "levenshtein"
+    """
+
+    def __init__(
+        self, left_on, window=3, threshold=0.9, method="levenshtein", **kwargs
+    ):
+        super(SortedNeighbourhood, self).__init__(
+            left_on=left_on, window=window, **kwargs
+        )
+        self.threshold = threshold
+        self.method = method
+
+    def _verify_pairs(self, pairs, df_a, df_b):
+        """Only keep pairs of which the sorting keys are similar enough"""
+        if self.threshold is None or len(pairs) == 0:
+            return pairs
+
+        compare_cl = recordlinkage.Compare()
+        compare_cl.string(self.left_on, self.left_on, method=self.method)
+        similarity = compare_cl.compute(pairs, df_a, df_b).iloc[:, 0]
+
+        return pairs[(similarity >= self.threshold).to_numpy()]
+
+    def _link_index(self, df_a, df_b):
+        pairs = super(SortedNeighbourhood, self)._link_index(df_a, df_b)
+        return self._verify_pairs(pairs, df_a, df_b)
+
+    def _dedup_index(self, df_a):
+        pairs = super(SortedNeighbourhood, self)._link_index(df_a, df_a)
+        pairs = pairs[pairs.codes[0] > pairs.codes[1]]
+        return self._verify_pairs(pairs, df_a, df_a)
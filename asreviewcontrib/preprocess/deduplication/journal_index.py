@@ -0,0 +1,133 @@
+import re
+
+import numpy as np
+
+# Minimum Dice similarity of character trigrams for matching journal names
+JOURNAL_MATCH_THRESHOLD = 0.85
+# Words left out of abbreviated journal names
+JOURNAL_STOP_WORDS = {"of", "the", "and", "for", "in", "on"}
+
+
+def _normalise_name(name):
+    """Lowercase journal name with only letters, digits and single spaces"""
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    return name.strip()
+
+
+def _trigrams(name):
+    """Unique character trigrams of a normalised name padded with spaces"""
+    padded = f" {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_abbreviation(abbr, word):
+    """Check if a word is an abbreviation of another word: both start with
+    the same letter and its letters appear in order in the other word, e.g.
+    'physiol' or 'natl' for 'physiology' or 'national'"""
+    if abbr[0] != word[0]:
+        return False
+    letters = iter(word)
+    return all(letter in letters for letter in abbr)
+
+
+def _same_journal(name, other):
+    """Check if two normalised names are variants of the same journal name:
+    without stop words, they have the same number of words and every word
+    is an abbreviation of the word of the other name at the same position"""
+    words = [word for word in name.split() if word not in JOURNAL_STOP_WORDS]
+    other_words = [word for word in other.split() if word not in JOURNAL_STOP_WORDS]
+    if len(words) != len(other_words):
+        return False
+    return all(
+        _is_abbreviation(word, other_word) or _is_abbreviation(other_word, word)
+        for word, other_word in zip(words, other_words)
+    )
+
+
+class JournalIndex:
+    """Character trigram inverted index over abbreviated and full journal
+    names for resolving approximate journal names to their full form
+
+    A name resolves to the most similar journal name in the index that is
+    a variant of the same name, i.e. it has the same words up to
+    abbreviations, case and punctuation. Names with other words, such as
+    "Journal of Surgery" and "ANZ Journal of Surgery", never match.
+
+    Parameters
+    ----------
+    journal_abbr : dict
+        Dictionary of journal name abbreviations and full forms
+    threshold : float, optional
+        Minimum Dice similarity of the trigrams of a name and a journal in
+        the index, by default JOURNAL_MATCH_THRESHOLD
+    """
+
+    def __init__(self, journal_abbr, threshold=JOURNAL_MATCH_THRESHOLD):
+        self.threshold = threshold
+
+        # Both abbreviations and full forms resolve to the full form
+        names = {}
+        for abbr, full_form in journal_abbr.items():
+            for name in (abbr, full_form):
+                names.setdefault(_normalise_name(name), full_form)
+        names.pop("", None)
+        self.names = list(names)
+        self.full_forms = list(names.values())
+
+        postings = {}
+        n_trigrams = np.zeros(len(self.names), dtype=np.int64)
+        for i, name in enumerate(self.names):
+            trigrams = _trigrams(name)
+            n_trigrams[i] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(i)
+        self.postings = {
+            trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()
+        }
+        self.n_trigrams = n_trigrams
+        self._exact = dict(zip(self.names, self.full_forms))
+
+    def resolve(self, journal):
+        """Get the full form of the most similar variant of the journal name
+        in the index, None if no variant is similar enough"""
+        name = _normalise_name(journal)
+        if not name:
+            return None
+        if name in self._exact:
+            return self._exact[name]
+
+        # A name with n trigrams has Dice similarity >= threshold only with
+        # names sharing at least min_shared trigrams, which must share one of
+        # the n - min_shared + 1 rarest trigrams (prefix filtering)
+        trigrams = _trigrams(name)
+        n_trigrams = len(trigrams)
+        min_shared = int(np.ceil(n_trigrams * self.threshold / (2 - self.threshold)))
+        postings = sorted(
+            (self.postings[t] for t in trigrams if t in self.postings), key=len
+        )
+        n_prefix = len(postings) - min_shared + 1
+        if n_prefix <= 0:
+            return None
+
+        candidates = np.unique(np.concatenate(postings[:n_prefix]))
+        max_trigrams = n_trigrams * (2 - self.threshold) / self.threshold
+        candidates = candidates[
+            (self.n_trigrams[candidates] >= min_shared)
+            & (self.n_trigrams[candidates] <= max_trigrams)
+        ]
+        if len(candidates) == 0:
+            return None
+
+        shared = np.zeros(len(candidates), dtype=np.int64)
+        for posting in postings:
+            positions = np.searchsorted(posting, candidates)
+            positions = np.minimum(positions, len(posting) - 1)
+            shared += posting[positions] == candidates
+        dice = 2 * shared / (n_trigrams + self.n_trigrams[candidates])
+        for i in np.argsort(-dice, kind="stable"):
+            if dice[i] < self.threshold:
+                break
+            if _same_journal(name, self.names[candidates[i]]):
+                return self.full_forms[candidates[i]]
+
+        return None
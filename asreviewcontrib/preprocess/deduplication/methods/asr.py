@@ -10,37 +10,43 @@ class ASRDedup(BaseDedup):
     Currently only working with dois as pid
     """
 
-    def __init__(self):
-        super(ASRDedup, self).__init__()
+    def __init__(self, **kwargs):
+        super(ASRDedup, self).__init__(**kwargs)
         self.data_df = None
         self.col_specs = None
 
-    def dedup(self, df, drop_duplicates=False):
+    def _prepare_data(self, df):
         self.col_specs = io_utils._get_column_spec(df)
-        self.data_df = df.copy().fillna("")[
-            [self.col_specs[col] for col in COLS_FOR_DEDUPE]
-        ]
-
-        clean = CleanPipeline(include=["title", "abstract", "doi"])
+        self._set_sources(df)
+        dedup_cols = [self.col_specs[col] for col in COLS_FOR_DEDUPE]
+        self.data_df = df[dedup_cols].fillna("")
+
+        clean = CleanPipeline(
+            include=["title", "abstract", "doi"],
+            engine="vectorised",
+            n_jobs=self.n_jobs,
+        )
         self.data_df = clean.apply_pipe(self.data_df)
 
         # Indexing - blocking
         # List of tuples of columns to combine for indexing
         concat_columns = [("title", "abstract")]
-        block_cols = self._create_combined_columns(concat_columns)
-        block_cols.append(self.col_specs["doi"])
-        candidate_pairs = self._get_candidate_pairs(block_cols)
+        key_cols = self._create_combined_columns(
+            concat_columns, hashed=self.indexing == "block"
+        )
 
-        # Comparing
-        pairs_df = self._get_pairs_df(candidate_pairs)
+        return key_cols, [self.col_specs["doi"]]
+
+    def dedup(self, df, drop_duplicates=False):
+        key_cols, block_cols = self._prepare_data(df)
 
-        # Filtering
+        # Comparing and filtering candidate pairs in batches
         # pairs are automatically filtered during blocking for the ASReview
         # method based on only doi and text (title + abstract)
-        pairs_rids = self._get_pair_rids(pairs_df)
-        groups_rids = self._get_groups_from_pairs(pairs_rids)
+        pairs_rids = self._get_duplicate_pair_rids(key_cols, block_cols=block_cols)
+        group_labels = self._get_group_labels(pairs_rids, df.index)
 
         # Deduplicate dataset
-        df = self._dedup(df, groups_rids, drop_duplicates)
+        df = self._dedup(df, group_labels, drop_duplicates)
 
         return df
@@ -35,7 +35,7 @@ class PreprocessEntryPoint(BaseEntryPoint):
                     metavar="input_path",
                     type=str,
                     nargs="+",
-                    help="The file path of the dataset.",
+                    help="The file path of the dataset. Multiple datasets are combined and deduplicated together.",
                 )
 
                 dedup_parser.add_argument(
@@ -61,6 +61,100 @@ class PreprocessEntryPoint(BaseEntryPoint):
                     help="Only export deduplicated records in the output file.",
                 )
 
+                dedup_parser.add_argument(
+                    "--indexing",
+                    dest="indexing",
+                    default="block",
+                    type=str,
+                    help="Indexing method for the blocking keys of the deduplication method (default: 'block'). Available ['block', 'minhash', 'sortedneighbourhood']",
+                )
+
+                dedup_parser.add_argument(
+                    "--lsh-bands",
+                    dest="lsh_bands",
+                    type=int,
+                    help="Number of LSH bands for 'minhash' indexing (default: 16)",
+                )
+
+                dedup_parser.add_argument(
+                    "--lsh-rows",
+                    dest="lsh_rows",
+                    type=int,
+                    help="Number of MinHash values per LSH band for 'minhash' indexing (default: 8)",
+                )
+
+                dedup_parser.add_argument(
+                    "--lsh-threshold",
+                    dest="lsh_threshold",
+                    type=float,
+                    help="Minimum estimated Jaccard similarity of text pairs for 'minhash' indexing (default: 0.8)",
+                )
+
+                dedup_parser.add_argument(
+                    "--window",
+                    dest="window",
+                    type=int,
+                    help="Window size (positive odd integer) for 'sortedneighbourhood' indexing (default: 3)",
+                )
+
+                dedup_parser.add_argument(
+                    "--sn-threshold",
+                    dest="sn_threshold",
+                    type=float,
+                    help="Minimum levenshtein similarity of the sorting keys of pairs for 'sortedneighbourhood' indexing (default: 0.9)",
+                )
+
+                dedup_parser.add_argument(
+                    "--max-block-size",
+                    dest="max_block_size",
+                    type=int,
+                    help="Maximum number of records in a block while blocking (default: no maximum). Larger blocks are handled according to --block-policy",
+                )
+
+                dedup_parser.add_argument(
+                    "--block-policy",
+                    dest="block_policy",
+                    default="keep",
+                    type=str,
+                    help="Policy for blocks larger than --max-block-size (default: 'keep'). Available ['keep', 'skip', 'split', 'subblock']",
+                )
+
+                dedup_parser.add_argument(
+                    "--corpus",
+                    dest="corpus_path",
+                    type=str,
+                    help="Path of the index of an already deduplicated corpus. Input records are only deduplicated against the corpus and each other, and added to the corpus. The index is created if it does not exist. Only supported with block indexing, the keep block policy and without --cross-source.",
+                )
+
+                dedup_parser.add_argument(
+                    "--cross-source",
+                    dest="cross_source_only",
+                    action="store_true",
+                    help="Only mark records from different input datasets as duplicates.",
+                )
+
+                dedup_parser.add_argument(
+                    "--link",
+                    dest="link",
+                    action="store_true",
+                    help="Link the second dataset against the first one: only records of the second dataset that are duplicates of records in the first dataset are marked, without comparing records within each dataset.",
+                )
+
+                dedup_parser.add_argument(
+                    "--n-jobs",
+                    dest="n_jobs",
+                    default=1,
+                    type=int,
+                    help="Number of processes used for loading multiple datasets, parsing large Endnote XML files, cleaning records and computing similarity features (default: 1). Use -1 for all cores.",
+                )
+
+                dedup_parser.add_argument(
+                    "--cache-dir",
+                    dest="cache_dir",
+                    type=str,
+                    help="Directory for caching standardised input datasets. Unchanged datasets are loaded from the cache instead of being parsed again.",
+                )
+
                 dedup_parser.add_argument(
                     "-o",
                     "--output",
@@ -70,21 +164,23 @@ class PreprocessEntryPoint(BaseEntryPoint):
 
                 dedup_args = dedup_parser.parse_args(argv[1:])
 
-                if len(dedup_args.input_path) > 1:
-                    raise ValueError(
-                        "Deduplicating records from multiple files"
-                        " via the CLI is not supported yet."
-                    )
-
-                input_path = dedup_args.input_path[0]
                 output_path = ep_utils.get_output_path(dedup_args)
 
                 apply_dedup(
-                    input_path=input_path,
+                    input_path=dedup_args.input_path,
                     output_path=output_path,
                     method=dedup_args.method,
                     pid=dedup_args.pid,
                     drop_duplicates=dedup_args.drop_duplicates,
+                    indexing=dedup_args.indexing,
+                    indexing_kwargs=ep_utils.get_indexing_kwargs(dedup_args),
+                    max_block_size=dedup_args.max_block_size,
+                    block_policy=dedup_args.block_policy,
+                    corpus_path=dedup_args.corpus_path,
+                    n_jobs=dedup_args.n_jobs,
+                    cross_source_only=dedup_args.cross_source_only,
+                    link=dedup_args.link,
+                    cache_dir=dedup_args.cache_dir,
                 )
 
             elif argv[0] == "update":
@@ -131,6 +227,13 @@ class PreprocessEntryPoint(BaseEntryPoint):
                     help="Method for saving retrieved matadata to local database (default: tinydb). Available [tinydb]",
                 )
 
+                update_parser.add_argument(
+                    "--cache-dir",
+                    dest="cache_dir",
+                    type=str,
+                    help="Directory for caching standardised input datasets. Unchanged datasets are loaded from the cache instead of being parsed again.",
+                )
+
                 update_parser.add_argument(
                     "-o",
                     "--output",
@@ -156,6 +259,7 @@ class PreprocessEntryPoint(BaseEntryPoint):
                     doi_update_method=update_args.doi_updater,
                     data_update_method=update_args.data_updater,
                     local_database=update_args.localdb,
+                    cache_dir=update_args.cache_dir,
                 )
 
             else:
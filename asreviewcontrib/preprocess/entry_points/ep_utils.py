@@ -23,3 +23,22 @@ def get_output_path(args, after="deduplicated"):
         output_path = os.path.basename(input_path)
         output_path = f"{os.path.splitext(output_path)[0]}-{after}-{datetime.now().strftime('%Y%m%dT%H%M')}.csv"
     return output_path
+
+
+def get_indexing_kwargs(args):
+    """Get keyword arguments for the indexing method of deduplication
+    from the arguments given by the user"""
+    indexing_args = {}
+    if args.indexing == "minhash":
+        indexing_args = {
+            "n_bands": args.lsh_bands,
+            "n_rows": args.lsh_rows,
+            "threshold": args.lsh_threshold,
+        }
+    elif args.indexing == "sortedneighbourhood":
+        indexing_args = {
+            "window": args.window,
+            "threshold": args.sn_threshold,
+        }
+
+    return {name: value for name, value in indexing_args.items() if value is not None}
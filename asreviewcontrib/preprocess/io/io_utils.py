@@ -94,3 +94,26 @@ def _get_column_spec(df):
             all_column_spec[data_type] = column_name
 
     return all_column_spec
+
+
+def _rename_to_column_spec(df, col_specs=None):
+    """Rename the columns of the column specification to their standard
+    names, e.g. 'Title' to 'title', so that datasets with different column
+    names can be combined
+
+    Returns
+    -------
+    tuple
+        tuple of:
+        renamed dataset and column specification
+    """
+    if col_specs is None:
+        col_specs = _get_column_spec(df)
+
+    columns = {
+        col: spec
+        for spec, col in col_specs.items()
+        if col != spec and spec not in df and spec != df.index.name
+    }
+    df = df.rename(columns=columns)
+    return df, {spec: columns.get(col, col) for spec, col in col_specs.items()}
@@ -1,8 +1,138 @@
+import io
+import os
+import re
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import pandas as pd
 from asreview.io.utils import _standardize_dataframe
 
+# Columns of the dataset read from Endnote XML files
+# recordID is overwritten by ASReview standardize_dataframe
+# TODO: Handle conflict between Endnote label and ASReview label
+COLUMNS = [
+    "recordID",
+    "ref_type",
+    "authors",
+    "title",
+    "year",
+    "journal",
+    "secondary_title",
+    "doi",
+    "pages",
+    "volume",
+    "number",
+    "abstract",
+    "isbn",
+    "url",
+]
+COLUMN_INDEX = {column: i for i, column in enumerate(COLUMNS)}
+
+# Columns of the fields in the first child of a child of a record
+FIELD_TAGS = {
+    "electronic-resource-num": COLUMN_INDEX["doi"],
+    "pages": COLUMN_INDEX["pages"],
+    "volume": COLUMN_INDEX["volume"],
+    "number": COLUMN_INDEX["number"],
+    "isbn": COLUMN_INDEX["isbn"],
+    "abstract": COLUMN_INDEX["abstract"],
+}
+# Columns of the fields nested one level deeper, by tag of the child
+NESTED_FIELD_TAGS = {
+    "titles": {
+        "title": COLUMN_INDEX["title"],
+        "secondary-title": COLUMN_INDEX["secondary_title"],
+    },
+    "periodical": {"full-title": COLUMN_INDEX["journal"]},
+    "dates": {"year": COLUMN_INDEX["year"]},
+}
+
+# Files are only split in shards of at least MIN_SHARD_SIZE bytes and at most
+# MAX_SHARD_SIZE bytes for parsing in parallel
+MIN_SHARD_SIZE = 8 * 1024**2
+MAX_SHARD_SIZE = 64 * 1024**2
+XML_ENCODING = re.compile(rb"""encoding=["']([A-Za-z0-9._-]+)["']""")
+
+
+def _find(f, pattern, offset, block_size=1024**2):
+    """Find the first position of a byte pattern in a file from an offset,
+    -1 if the pattern is not found"""
+    f.seek(offset)
+    overlap = b""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return -1
+        position = (overlap + block).find(pattern)
+        if position >= 0:
+            return offset - len(overlap) + position
+        overlap = block[-len(pattern) + 1 :]
+        offset += len(block)
+
+
+def _find_record_start(f, offset):
+    """Find the first position of a <record> start tag from an offset"""
+    while True:
+        position = _find(f, b"<record", offset)
+        if position < 0:
+            return -1
+        # Skip other tags with the same prefix, such as <records>
+        f.seek(position + len(b"<record"))
+        next_byte = f.read(1)
+        if next_byte == b">" or next_byte.isspace():
+            return position
+        if not next_byte:
+            return -1
+        offset = position + 1
+
+
+def _get_shards(fp, n_shards):
+    """Split the records of an Endnote XML file in byte ranges at <record>
+    start tags, None if the file can not be split
+
+    Records are assumed to be all <record> elements between the first
+    <record> and the last </records> tag of a UTF-8 (or ASCII) file.
+    """
+    with open(fp, "rb") as f:
+        prolog = f.read(256)
+        encoding = XML_ENCODING.search(prolog)
+        if prolog.startswith((b"\xff\xfe", b"\xfe\xff")) or (
+            encoding and encoding.group(1).lower() not in (b"utf-8", b"utf8", b"ascii")
+        ):
+            return None
+
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - 1024**2, 0))
+        end = f.read().rfind(b"</records>")
+        start = _find_record_start(f, 0)
+        if end < 0 or start < 0:
+            return None
+        end += max(size - 1024**2, 0)
+
+        starts = [start]
+        for k in range(1, n_shards):
+            position = _find_record_start(f, start + k * (end - start) // n_shards)
+            if starts[-1] < position < end:
+                starts.append(position)
+
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def _read_shard(fp, start, end):
+    """Read the columns of the records in a byte range of an Endnote XML
+    file"""
+    with open(fp, "rb") as f:
+        f.seek(start)
+        records = f.read(end - start)
+
+    columns = [[] for _ in COLUMNS]
+    shard = io.BytesIO(b"<xml><records>" + records + b"</records></xml>")
+    for record in EndnoteXMLReader._iter_records(shard):
+        EndnoteXMLReader._parse_record(record, columns)
+
+    return columns
+
 
 class EndnoteXMLReader:
     """Endnote XML file reader."""
@@ -11,105 +141,123 @@ class EndnoteXMLReader:
     write_format = [".csv", ".tsv", ".xlsx"]
 
     @classmethod
-    def read_data(cls, fp):
+    def read_data(cls, fp, n_jobs=1):
         """Import dataset from Endnote XML file.
 
+        The file is parsed incrementally and every record is cleared after
+        its fields are extracted, so only one record is kept in memory next
+        to the columns of the dataset.
+
         Arguments
         ---------
         fp: str, pathlib.Path
             File path to the XML file.
+        n_jobs: int
+            Number of processes used for parsing, by default 1. If -1, all
+            cores are used. Large files are split in shards of records which
+            are parsed in parallel.
 
         Returns
         -------
         list:
             List with entries.
         """
-        tree = ET.parse(fp)
-        root = tree.getroot()
-        dataset_list = []
-        for i, record in enumerate(root[0]):
-            try:
-                record_id = record.find("rec-number").text
-            except (AttributeError, TypeError):
-                record_id = None
-            try:
-                ref_type = record.find("ref-type").attrib["name"]
-            except (AttributeError, TypeError):
-                ref_type = None
-            try:
-                authors = ", ".join(
-                    author[0].text
-                    for author in record.find("contributors").find("authors")
-                )
-            except (AttributeError, TypeError):
-                authors = None
-            try:
-                title = record.find("titles").find("title")[0].text
-            except (AttributeError, TypeError):
-                title = None
-            try:
-                second_title = record.find("titles").find("secondary-title")[0].text
-            except (AttributeError, TypeError):
-                second_title = None
-            try:
-                journal = record.find("periodical").find("full-title")[0].text
-            except (AttributeError, TypeError):
-                journal = None
-            try:
-                doi = record.find("electronic-resource-num")[0].text
-            except (AttributeError, TypeError):
-                doi = None
-            try:
-                pages = record.find("pages")[0].text
-            except (AttributeError, TypeError):
-                pages = None
-            try:
-                volume = record.find("volume")[0].text
-            except (AttributeError, TypeError):
-                volume = None
-            try:
-                number = record.find("number")[0].text
-            except (AttributeError, TypeError):
-                number = None
-            try:
-                year = record.find("dates").find("year")[0].text
-            except (AttributeError, TypeError):
-                year = None
-            try:
-                url = record.find("urls").find("related-urls").find("url")[0].text
-            except (AttributeError, TypeError):
-                url = None
-            try:
-                isbn = record.find("isbn")[0].text
-            except (AttributeError, TypeError):
-                isbn = None
-            try:
-                abstract = record.find("abstract")[0].text
-            except (AttributeError, TypeError):
-                abstract = None
-
-            dataset_list.append(
-                {
-                    "recordID": record_id,
-                    # record_id is overwritten by ASReview standardize_dataframe
-                    "ref_type": ref_type,
-                    "authors": authors,
-                    "title": title,
-                    "year": year,
-                    "journal": journal,
-                    "secondary_title": second_title,
-                    "doi": doi,
-                    "pages": pages,
-                    "volume": volume,
-                    "number": number,
-                    "abstract": abstract,
-                    "isbn": isbn,
-                    "url": url,
-                    # "label": label,
-                    # TODO: Handle conflict between Endnote label and ASReview label
-                }
-            )
-
-        df = pd.DataFrame(dataset_list)
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+
+        shards = None
+        is_file = isinstance(fp, (str, os.PathLike)) and os.path.isfile(fp)
+        if n_jobs > 1 and is_file:
+            size = os.path.getsize(fp)
+            n_shards = min(4 * n_jobs, size // MIN_SHARD_SIZE)
+            n_shards = max(n_shards, -(-size // MAX_SHARD_SIZE))
+            if n_shards > 1:
+                shards = _get_shards(fp, n_shards)
+
+        columns = [[] for _ in COLUMNS]
+        if shards:
+            # Columns of the shards are concatenated in order of the shards
+            starts, ends = zip(*shards)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                for shard_columns in executor.map(
+                    _read_shard, repeat(fp), starts, ends
+                ):
+                    for column, shard_column in zip(columns, shard_columns):
+                        column.extend(shard_column)
+        else:
+            for record in cls._iter_records(fp):
+                cls._parse_record(record, columns)
+
+        df = pd.DataFrame(dict(zip(COLUMNS, columns)))
         df, _ = _standardize_dataframe(df)
         return df
+
+    @classmethod
+    def _iter_records(cls, fp):
+        """Iterate over the records (children of the first child of the root
+        element) of an Endnote XML file, clearing every record after use"""
+        depth = 0
+        n_root_children = 0
+        records = None
+        for event, element in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    n_root_children += 1
+                    if n_root_children == 1:
+                        records = element
+                continue
+
+            if depth == 3 and n_root_children == 1:
+                yield element
+                records.remove(element)
+                element.clear()
+            elif depth == 2 and n_root_children > 1:
+                element.clear()
+            depth -= 1
+
+    @classmethod
+    def _parse_record(cls, record, columns):
+        """Extract the fields of a record with one traversal of its children
+        and append them to the column lists
+
+        As with `record.find`, only the first child with a tag is used.
+        """
+        values = [None] * len(COLUMNS)
+        seen_tags = set()
+        for child in record:
+            tag = child.tag
+            if tag in seen_tags:
+                continue
+            seen_tags.add(tag)
+
+            if tag in FIELD_TAGS:
+                values[FIELD_TAGS[tag]] = child[0].text
+            elif tag in NESTED_FIELD_TAGS:
+                fields = NESTED_FIELD_TAGS[tag]
+                seen_nested_tags = set()
+                for nested in child:
+                    if nested.tag in fields and nested.tag not in seen_nested_tags:
+                        seen_nested_tags.add(nested.tag)
+                        values[fields[nested.tag]] = nested[0].text
+            elif tag == "rec-number":
+                values[COLUMN_INDEX["recordID"]] = child.text
+            elif tag == "ref-type":
+                values[COLUMN_INDEX["ref_type"]] = child.attrib["name"]
+            elif tag == "contributors":
+                authors = child.find("authors")
+                if authors is not None:
+                    try:
+                        values[COLUMN_INDEX["authors"]] = ", ".join(
+                            author[0].text for author in authors
+                        )
+                    except TypeError:
+                        pass
+            elif tag == "urls":
+                related_urls = child.find("related-urls")
+                url = related_urls.find("url") if related_urls is not None else None
+                if url is not None:
+                    values[COLUMN_INDEX["url"]] = url[0].text
+
+        for column, value in zip(columns, values):
+            column.append(value)
@@ -15,6 +15,7 @@ def update_records(
     doi_update_method="crossref",
     data_update_method="openalex",
     local_database="tinydb",
+    cache_dir=None,
 ):
     """Find missing information and update records
 
@@ -32,8 +33,10 @@ def update_records(
         Data Updater, by default "openalex"
     local_database: str
         Local database method for saving retrieved metadata, by default "tinydb"
+    cache_dir: str
+        Directory of the cache of standardised input datasets, by default None
     """
-    records_df, _ = load_data(input_path)
+    records_df, _ = load_data(input_path, cache_dir=cache_dir)
 
     col_specs = io_utils._get_column_spec(records_df)
     print(f"Column Definitions: {col_specs}")
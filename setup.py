@@ -43,7 +43,10 @@ setup(
         "recordlinkage",
         "tqdm",
     ],
-    extras_require={},
+    extras_require={
+        "rapidfuzz": ["rapidfuzz>=3.6"],
+        "arrow": ["pyarrow"],
+    },
     entry_points={
         "asreview.entry_points": [
             "preprocess = asreviewcontrib.preprocess.entry_points.entrypoint:PreprocessEntryPoint",
@@ -0,0 +1,109 @@
+import os
+
+import pandas as pd
+import pytest
+from asreviewcontrib.preprocess.data import cache as cache_module
+from asreviewcontrib.preprocess.data import load
+from asreviewcontrib.preprocess.data.cache import DatasetCache
+
+
+def _write_dataset(path, title="Title"):
+    pd.DataFrame(
+        {
+            "title": [f"{title} {i}" for i in range(3)],
+            "abstract": [f"Abstract {i}" for i in range(3)],
+            "authors": ["Smith, J."] * 3,
+            "year": [2000, 2001, 2002],
+            "journal": ["Nature"] * 3,
+            "doi": [f"10.1000/{i}" for i in range(3)],
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def n_reads(monkeypatch):
+    """Count the datasets read by the ASReview readers"""
+    calls = []
+
+    def counting_load_data(*args, **kwargs):
+        calls.append(args)
+        return asreview_load_data(*args, **kwargs)
+
+    asreview_load_data = load.asreview_load_data
+    monkeypatch.setattr(load, "asreview_load_data", counting_load_data)
+    return calls
+
+
+def _files(cache_dir, suffix):
+    return [name for name in os.listdir(cache_dir) if name.endswith(suffix)]
+
+
+def test_load_data_cache_hit(tmp_path, n_reads):
+    fp = _write_dataset(tmp_path / "data.csv")
+    cache_dir = tmp_path / "cache"
+
+    df, col_specs = load.load_data(fp, cache_dir=cache_dir)
+    cached_df, cached_col_specs = load.load_data(fp, cache_dir=cache_dir)
+
+    assert len(n_reads) == 1
+    pd.testing.assert_frame_equal(cached_df, df)
+    assert cached_col_specs == col_specs
+
+
+def test_load_data_cache_miss_after_change(tmp_path, n_reads):
+    fp = _write_dataset(tmp_path / "data.csv")
+    cache_dir = tmp_path / "cache"
+    load.load_data(fp, cache_dir=cache_dir)
+
+    _write_dataset(fp, title="Changed")
+    os.utime(fp, ns=(0, os.stat(fp).st_mtime_ns + 10**9))
+    df, _ = load.load_data(fp, cache_dir=cache_dir)
+
+    assert len(n_reads) == 2
+    assert df["title"].tolist() == ["Changed 0", "Changed 1", "Changed 2"]
+    # The content hash of the old file is not kept
+    assert len(_files(cache_dir, ".key")) == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "pa", None)
+    cache = DatasetCache(tmp_path / "cache")
+    paths = [_write_dataset(tmp_path / f"{name}.csv", name) for name in "abc"]
+    datasets = [load.load_data(fp) for fp in paths]
+
+    for i, (fp, (df, col_specs)) in enumerate(zip(paths[:2], datasets)):
+        cache.put(fp, df, col_specs)
+        entry = os.path.join(cache.cache_dir, cache.fingerprint(fp) + ".pkl")
+        os.utime(entry, ns=(0, (i + 1) * 10**9))
+    entry_size = os.path.getsize(entry)
+
+    # Using the oldest entry makes the other one least recently used
+    assert cache.get(paths[0]) is not None
+    cache.max_size = int(2.5 * entry_size)
+    cache.put(paths[2], *datasets[2])
+
+    assert cache.get(paths[0]) is not None
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[2]) is not None
+    assert len(_files(cache.cache_dir, ".pkl")) == 2
+
+
+def test_feather_round_trip(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    fp = _write_dataset(tmp_path / "data.csv")
+    df, col_specs = load.load_data(fp)
+
+    feather_cache = DatasetCache(tmp_path / "feather")
+    feather_cache.put(fp, df, col_specs)
+    assert len(_files(feather_cache.cache_dir, ".feather")) == 1
+    feather_df, feather_col_specs = feather_cache.get(fp)
+
+    monkeypatch.setattr(cache_module, "pa", None)
+    pickle_cache = DatasetCache(tmp_path / "pickle")
+    pickle_cache.put(fp, df, col_specs)
+    pickle_df, _ = pickle_cache.get(fp)
+
+    assert feather_col_specs == col_specs
+    assert feather_df.dtypes.to_dict() == pickle_df.dtypes.to_dict()
+    pd.testing.assert_frame_equal(feather_df, pickle_df)
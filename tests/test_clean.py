@@ -0,0 +1,252 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+from asreviewcontrib.preprocess.deduplication import dd_utils, dd_vec_utils
+from asreviewcontrib.preprocess.deduplication.clean_pipeline import (
+    CleanPipeline,
+    clean_funcs,
+)
+from unidecode import unidecode
+
+VALUES = {
+    "title": [
+        "Deep &amp; learning <i>for</i> systematic reviews",
+        "Title&nbsp;with &lt;entities&gt; &copy; &euro;",
+        "Ünïcödé café naïve Müller",
+        "Ωmega – dash “quotes”",
+        "日本語 title",
+        "  multiple   spaces\tand\nnewlines ",
+        "",
+    ],
+    "authors": [
+        "Müller, K.; O'Neil, R.",
+        "Smith, J. A.; Doe, J.",
+        'van der Berg, P.; "Jones", B.',
+        "Łukasz, W. and Ørsted, H. C.",
+        "Smith-Jones, Anna",
+        "",
+    ],
+    "year": ["2020", "", "n.d.", "2019a"],
+    "doi": [
+        "10.1000/abc",
+        "https://doi.org/10.1000/xyz ",
+        "doi:10.1016/j.x.2020.01",
+        "DOI 10.1002/(SICI)1097",
+        "PMID 12345",
+        "no doi here",
+        "",
+    ],
+    "pages": [
+        "311-7",
+        "1-10",
+        "1234-56",
+        "12-05-2001",
+        "published 01-02-2003",
+        "e1234",
+        "S12-S15",
+        "100",
+        "pp. 5 - 9",
+        "abc",
+        "",
+    ],
+    "volume": ["12 (no pagination)", "Vol 3", "IV", ""],
+    "number": ["1", "Suppl 2", ""],
+    "isbn": [
+        "1234-5678 (Print)",
+        "1234-5678 (Electronic) 8765-4321 (Print)",
+        "1234-5678\\r8765-4321",
+        "1234-5678\r8765-4321",
+        "978-3-16-148410-0",
+        "",
+    ],
+}
+
+
+# Regular expression of the author names found by clean_authors, which
+# backtracks exponentially on long runs of letters and whitespace
+AUTHOR_REGEX = re.compile(
+    r"\s?(?P<last>([A-Z]?[a-z]*\s?)*-?[A-Z][a-z]+),?\s+(?P<first>[A-Z])"
+    r"(?P<full>[a-z])?.?\s?(?P<middle>[A-Z])?.?"
+)
+
+
+def _journals():
+    journal_abbr = dd_utils.get_journal_abbreviations()
+    abbreviations = list(journal_abbr)[:20]
+    return abbreviations + [
+        "J. Biomed. Inform.",
+        "Some Unknown Journal of Things",
+        "Revista Española de Cardiología",
+        "",
+    ]
+
+
+def _clean_python(values, col):
+    # Missing results of the per-value functions (e.g. clean_pages of an
+    # empty value) are filled with "" by the cleaning pipeline
+    return pd.Series(values, dtype=object).apply(clean_funcs[col]).fillna("")
+
+
+def _fuzz_values(n_values=300, seed=0):
+    rng = np.random.default_rng(seed)
+    alphabet = list("abcXYZ019 -.,;:()/<>&\r\n\t\\") + ["é", "ß", "Ø", "–", "&amp;"]
+    return [
+        "".join(rng.choice(alphabet, size=rng.integers(0, 25))) for _ in range(n_values)
+    ]
+
+
+@pytest.mark.parametrize("col", list(VALUES))
+def test_vectorised_cleaning_equals_python(col):
+    values = pd.Series(VALUES[col], dtype=object)
+
+    expected = _clean_python(values, col)
+    cleaned = getattr(dd_vec_utils, f"clean_{col}")(values)
+
+    assert cleaned.tolist() == expected.tolist()
+
+
+def test_vectorised_journal_cleaning_equals_python():
+    values = pd.Series(_journals(), dtype=object)
+
+    expected = _clean_python(values, "journal")
+    cleaned = dd_vec_utils.clean_journal(values)
+    assert cleaned.tolist() == expected.tolist()
+
+    expected = values.apply(dd_utils.clean_journal_fuzzy)
+    cleaned = dd_vec_utils.clean_journal_fuzzy(values)
+    assert cleaned.tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize(
+    "col", ["title", "abstract", "doi", "pages", "volume", "number", "isbn"]
+)
+def test_vectorised_cleaning_equals_python_fuzzed(col):
+    values = pd.Series(_fuzz_values(), dtype=object)
+
+    expected = _clean_python(values, col)
+    cleaned = getattr(dd_vec_utils, f"clean_{col}")(values)
+
+    assert cleaned.tolist() == expected.tolist()
+
+
+def test_clean_doi_without_doi_is_empty_string():
+    values = ["PMID 12345", "no doi here", ""]
+
+    assert [dd_utils.clean_doi(value) for value in values] == ["", "", ""]
+    assert dd_vec_utils.clean_doi(pd.Series(values)).tolist() == ["", "", ""]
+    assert dd_utils.clean_doi("doi: 10.1000/abc ") == "https://doi.org/10.1000/ABC"
+
+
+def test_clean_pages():
+    assert dd_utils.clean_pages("311-7") == "311-317"
+    assert dd_utils.clean_pages("1234-56") == "1234-1256"
+    assert dd_utils.clean_pages("12-05-2001") == ""
+    assert dd_utils.clean_pages("100") == "100"
+
+
+def _records():
+    n_values = max(len(values) for values in VALUES.values())
+    columns = {col: (values * n_values)[:n_values] for col, values in VALUES.items()}
+    columns["abstract"] = columns["title"][::-1]
+    columns["journal"] = _journals()[:n_values]
+    return pd.DataFrame(columns)
+
+
+@pytest.mark.parametrize("memoise", [True, False])
+def test_clean_pipeline_engines_are_equal(memoise):
+    df = _records()
+
+    cleaned_python = CleanPipeline(engine="python", memoise=memoise).apply_pipe(df)
+    cleaned_vectorised = CleanPipeline(engine="vectorised", memoise=memoise).apply_pipe(
+        df
+    )
+
+    pd.testing.assert_frame_equal(cleaned_python, cleaned_vectorised)
+
+
+def test_clean_pipeline_skips_cleaned_columns():
+    df = _records()
+    pipeline = CleanPipeline(include=["title"])
+    cleaned = pipeline.apply_pipe(df)
+    assert cleaned.attrs["cleaned_columns"] == ["title"]
+
+    # Cleaning again does not change the cleaned columns
+    cleaned.loc[0, "title"] = "not cleaned"
+    assert pipeline.apply_pipe(cleaned).loc[0, "title"] == "not cleaned"
+
+
+def test_journal_variants_resolve_to_full_form():
+    assert (
+        dd_utils.clean_journal_fuzzy("Jounal of Biomedical Informatics")
+        == "Journal of Biomedical Informatics"
+    )
+    assert (
+        dd_utils.clean_journal_fuzzy("American journal of surgery.")
+        == "American Journal of Surgery"
+    )
+
+
+@pytest.mark.parametrize(
+    "journal",
+    ["Journal of Applied Physiology", "Journal of Surgery", "Journal of Psychiatry"],
+)
+def test_other_journals_are_not_resolved(journal):
+    # e.g. not "Canadian Journal of Applied Physiology", "ANZ Journal of
+    # Surgery" or "Nordic Journal of Psychiatry"
+    assert dd_utils.resolve_journal(journal) is None
+    assert dd_utils.clean_journal_fuzzy(journal) == journal
+    assert dd_vec_utils.clean_journal_fuzzy(pd.Series([journal])).tolist() == [journal]
+
+
+def test_journals_are_only_resolved_if_requested():
+    journal = "Jounal of Biomedical Informatics"
+    df = _records()
+    df.loc[0, "journal"] = journal
+
+    assert dd_utils.clean_journal(journal) == journal
+    assert dd_vec_utils.clean_journal(pd.Series([journal])).tolist() == [journal]
+    for engine in ["python", "vectorised"]:
+        cleaned = CleanPipeline(include=["journal"], engine=engine).apply_pipe(df)
+        assert cleaned.loc[0, "journal"] == journal
+        cleaned = CleanPipeline(
+            include=["journal"], engine=engine, resolve_journals=True
+        ).apply_pipe(df)
+        assert cleaned.loc[0, "journal"] == "Journal of Biomedical Informatics"
+
+
+def _clean_authors_regex(authors):
+    matches = AUTHOR_REGEX.finditer(unidecode(authors).replace('"', ""))
+    return " ".join(
+        (
+            f"{match.group('last')} {match.group('first')} {match.group('middle')}"
+            if match.group("middle")
+            else f"{match.group('last')} {match.group('first')}"
+        )
+        for match in matches
+    )
+
+
+def test_parse_authors_equals_regex():
+    rng = np.random.default_rng(0)
+    alphabet = list("ABJKaeinosz  ,.;-\n\t\"'")
+    # Short values, as the regular expression is too slow on long values
+    values = [
+        "".join(rng.choice(alphabet, size=rng.integers(0, 31))) for _ in range(20000)
+    ]
+    values += VALUES["authors"] + ["Smith, J.A.", "Smith J A", "de la Cruz, M-J"]
+
+    for value in values:
+        authors = _clean_authors_regex(value)
+        expected = (authors, dd_utils._get_first_author(authors))
+        assert dd_utils.parse_authors(value) == expected, value
+
+
+@pytest.mark.parametrize("cache_size", [None, 10])
+def test_clean_pipeline_missing_values_of_added_functions(cache_size):
+    df = pd.DataFrame({"title": ["x", "", "z", "x"]})
+    pipeline = CleanPipeline(include=["title"], cache_size=cache_size)
+    pipeline.add("title", lambda value: value or None)
+
+    assert pipeline.apply_pipe(df)["title"].tolist() == ["X", "", "Z", "X"]
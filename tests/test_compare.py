@@ -0,0 +1,73 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+from asreviewcontrib.preprocess.config import COLS_FOR_DEDUPE
+from asreviewcontrib.preprocess.deduplication import compare
+
+pytest.importorskip("rapidfuzz")
+
+
+def _records(n_records=80, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["deep", "learning", "review", "SCREENING", "café", "naïve", "a", "1"]
+    values = {}
+    for col in COLS_FOR_DEDUPE:
+        column = [
+            " ".join(rng.choice(words, size=rng.integers(1, 6)))
+            for _ in range(n_records)
+        ]
+        # Missing values and empty strings, also in pairs with each other
+        for i in rng.choice(n_records, size=n_records // 5, replace=False):
+            column[i] = np.nan if rng.random() < 0.5 else ""
+        column[:4] = [np.nan, np.nan, "", ""]
+        values[col] = column
+    df = pd.DataFrame(values, dtype=object)
+    df.index = pd.Index(np.arange(n_records) * 3, name="record_id")
+    return df
+
+
+@pytest.mark.parametrize("method", ["jarowinkler", "levenshtein"])
+def test_rapidfuzz_features_equal_recordlinkage(method):
+    df = _records()
+    col_specs = {col: col for col in COLS_FOR_DEDUPE}
+    pairs = pd.MultiIndex.from_tuples(
+        [(df.index[j], df.index[i]) for i, j in combinations(range(len(df)), 2)]
+    )
+
+    expected = compare.compute_features(
+        pairs, df, col_specs, method=method, backend="recordlinkage"
+    )
+    features = compare.compute_features(
+        pairs, df, col_specs, method=method, backend="rapidfuzz"
+    )
+
+    pd.testing.assert_frame_equal(features, expected, check_exact=True)
+
+
+def test_compute_features_with_shared_executor():
+    df = _records()
+    col_specs = {col: col for col in COLS_FOR_DEDUPE}
+    pairs = pd.MultiIndex.from_tuples(
+        [(df.index[j], df.index[i]) for i, j in combinations(range(len(df)), 2)]
+    )
+    batches = [pairs[:1000], pairs[1000:]]
+
+    executor = compare.get_feature_executor(df, col_specs, n_jobs=2)
+    with executor:
+        features = [
+            compare.compute_features_parallel(
+                batch,
+                df,
+                col_specs,
+                n_jobs=2,
+                chunk_size=300,
+                backend="recordlinkage",
+                executor=executor,
+            )
+            for batch in batches
+        ]
+
+    expected = compare.compute_features(pairs, df, col_specs, backend="recordlinkage")
+    pd.testing.assert_frame_equal(pd.concat(features), expected)
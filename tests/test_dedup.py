@@ -0,0 +1,244 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from asreviewcontrib.preprocess.deduplication import compare
+from asreviewcontrib.preprocess.deduplication.filter_pipeline import (
+    FilterPipeline,
+    Filtr,
+)
+from asreviewcontrib.preprocess.deduplication.incremental import CorpusIndex
+from asreviewcontrib.preprocess.deduplication.methods.asr import ASRDedup
+from asreviewcontrib.preprocess.deduplication.methods.endnote_default import (
+    ENDefaultDedup,
+)
+
+
+def _records():
+    df = pd.DataFrame(
+        {
+            "title": [
+                "Deep learning for screening",
+                "Deep learning for screening",
+                "Active learning in systematic reviews",
+                "Editorial",
+                "Editorial",
+                "A study of something else",
+            ],
+            "abstract": ["An abstract", "An abstract", "Other", "", "", "Text"],
+            "authors": [
+                "Smith, J.; Doe, A.",
+                "Smith, J.; Doe, A.",
+                "Jones, B.",
+                "",
+                "",
+                "Brown, C.",
+            ],
+            "year": [2020, 2020, 2019, 2001, 2001, 2018],
+            "journal": ["J Biomed Inform"] * 3 + ["", "", "Nature"],
+            "doi": [
+                "10.1000/abc",
+                "https://doi.org/10.1000/ABC",
+                "PMID 12345",
+                "PMID 23456",
+                "",
+                "PMID 12345",
+            ],
+            "volume": ["1", "1", "2", "", "", "3"],
+            "pages": ["1-10", "1-10", "11-20", "", "", "21-30"],
+            "number": ["1", "1", "2", "", "", "3"],
+            "issn": [""] * 6,
+        }
+    )
+    df.index.name = "record_id"
+    return df
+
+
+def test_set_missing_values_clears_empty_values():
+    dedup = ASRDedup()
+    dedup.data_df = pd.DataFrame(
+        {"doi": ["https://doi.org/10.1", "", [], None], "year": [1, 2, 3, 4]}
+    )
+    dedup._set_missing_values()
+
+    assert dedup.data_df["doi"].isna().tolist() == [False, True, True, True]
+    assert dedup.data_df["doi"].dtype == object
+    assert dedup.data_df["year"].tolist() == [1, 2, 3, 4]
+
+
+def test_dedup_keeps_latest_record_with_abstract():
+    df = pd.DataFrame(
+        {
+            "title": ["A"] * 4 + ["B"] * 3 + ["C", "D"],
+            "abstract": ["", "Text", "Text", "", "", "", "Text", "", "Text"],
+            "year": [2021, 2018, 2019, "", 2001, "n.d.", None, 2000, 2000],
+        },
+        index=pd.Index([5, 3, 8, 1, 9, 2, 7, 4, 6], name="record_id"),
+    )
+    group_labels = [1, 1, 1, 1, 2, 2, 2, 0, 0]
+    dedup = ASRDedup()
+    dedup.col_specs = {"title": "title", "abstract": "abstract", "year": "year"}
+
+    result = dedup._dedup(df, group_labels, drop_duplicates=False).sort_index()
+    kept = result.index[result["keep_remove"] == "KEEP"].tolist()
+    # The record with an abstract and the latest year of every group, and
+    # all records without duplicates
+    assert kept == [4, 6, 7, 8]
+    assert result.loc[df.index, "duplicate_group_id"].tolist() == group_labels
+
+    dropped = dedup._dedup(df, group_labels, drop_duplicates=True)
+    assert sorted(dropped.index) == kept
+    assert list(dropped.columns) == list(df.columns)
+
+
+def test_asr_dedup_with_non_doi_strings():
+    df = ASRDedup().dedup(_records()).sort_index()
+
+    # Non-DOI strings are missing DOIs, so records 2 and 5 are not blocked
+    # together on the same "PMID 12345"
+    groups = df["duplicate_group_id"].to_numpy()
+    assert groups[0] == groups[1] > 0
+    assert groups[3] == groups[4] > 0
+    assert np.all(groups[[2, 5]] == 0)
+    assert (df["keep_remove"] == "REMOVE").sum() == 2
+
+
+def test_endnote_dedup():
+    df = ENDefaultDedup().dedup(_records())
+
+    groups = df.sort_index()["duplicate_group_id"].to_numpy()
+    assert groups[0] == groups[1] > 0
+    assert groups[3] == groups[4] > 0
+    assert np.all(groups[[2, 5]] == 0)
+
+
+def test_feature_executor_is_shared_by_batches(monkeypatch):
+    executors = []
+    get_feature_executor = compare.get_feature_executor
+
+    def counting_get_feature_executor(*args, **kwargs):
+        executors.append(get_feature_executor(*args, **kwargs))
+        return executors[-1]
+
+    monkeypatch.setattr(compare, "get_feature_executor", counting_get_feature_executor)
+    title_filter = Filtr()
+    title_filter.add("title", 0.9)
+    filter_pipeline = FilterPipeline()
+    filter_pipeline.add("title", title_filter)
+
+    pair_rids = []
+    for n_jobs in [1, 2]:
+        dedup = ENDefaultDedup(
+            n_jobs=n_jobs, batch_size=1, compare_backend="recordlinkage"
+        )
+        key_cols, _ = dedup._prepare_data(_records().astype({"year": str}))
+        pair_rids.append(
+            dedup._get_duplicate_pair_rids(key_cols, filter_pipeline=filter_pipeline)
+        )
+
+    assert len(executors) == 2
+    assert executors[0] is None and executors[1] is not None
+    assert dedup._executor is None
+    np.testing.assert_array_equal(pair_rids[0], pair_rids[1])
+    assert len(pair_rids[1]) == 2
+
+
+def test_incremental_dedup_reports_block_plans(tmp_path):
+    corpus_path = str(tmp_path / "corpus.pkl")
+    records = _records()
+    dedup = ASRDedup(max_block_size=1)
+    first = dedup.dedup_incremental(records.iloc[:3], corpus_path)
+    assert [plan["column"] for plan in dedup.block_plans] == [
+        "doi",
+        "title_abstract",
+    ]
+
+    second = dedup.dedup_incremental(records.iloc[3:], corpus_path)
+    assert first["keep_remove"].tolist().count("REMOVE") == 1
+    assert second.sort_index()["keep_remove"].tolist() == ["KEEP", "REMOVE", "KEEP"]
+
+
+def test_incremental_dedup_mixed_column_names(tmp_path):
+    corpus_path = str(tmp_path / "corpus.pkl")
+    records = _records()
+    upper = records.rename(columns={"title": "Title", "doi": "DOI"})
+    ASRDedup().dedup_incremental(upper.iloc[[0, 2, 3]], corpus_path)
+    df = ASRDedup().dedup_incremental(records.iloc[[1, 4, 5]], corpus_path)
+
+    assert df.columns.tolist() == list(records) + [
+        "duplicate_group_id",
+        "keep_remove",
+    ]
+    assert df.sort_index()["keep_remove"].tolist() == ["REMOVE", "REMOVE", "KEEP"]
+    assert set(CorpusIndex.load(corpus_path).key_index) == {"doi", "title_abstract"}
+
+
+def test_corpus_save_is_atomic(tmp_path, monkeypatch):
+    corpus_path = str(tmp_path / "corpus.pkl")
+    ASRDedup().dedup_incremental(_records().iloc[:3], corpus_path)
+    corpus = CorpusIndex.load(corpus_path)
+
+    def failing_to_pickle(obj, path, *args, **kwargs):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd, "to_pickle", failing_to_pickle)
+    with pytest.raises(OSError):
+        corpus.save(corpus_path)
+
+    assert os.listdir(tmp_path) == ["corpus.pkl"]
+    assert CorpusIndex.load(corpus_path).next_record_id == 3
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"max_block_size": 10, "block_policy": "skip"},
+        {"max_block_size": 10, "block_policy": "split"},
+        {"cross_source_only": True},
+        {"indexing": "minhash"},
+    ],
+)
+def test_incremental_dedup_rejects_unsupported_options(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        ASRDedup(**kwargs).dedup_incremental(_records(), str(tmp_path / "c.pkl"))
+
+
+def test_link():
+    records = _records()
+    df = ASRDedup().link(records.iloc[[0, 2, 3]], records.iloc[[1, 4, 5]])
+
+    assert df.index.tolist() == [1, 4, 5]
+    assert df["keep_remove"].tolist() == ["REMOVE", "REMOVE", "KEEP"]
+
+
+def test_link_mixed_column_names():
+    records = _records()
+    upper = records.rename(columns={"title": "Title", "doi": "DOI", "issn": "ISSN"})
+    upper["extra"] = "left only"
+
+    for df_left, df_right in [(upper, records), (records, upper)]:
+        df = ASRDedup().link(df_left.iloc[[0, 2, 3]], df_right.iloc[[1, 4, 5]])
+
+        assert df.columns.tolist() == list(df_right) + [
+            "duplicate_group_id",
+            "keep_remove",
+        ]
+        assert df["keep_remove"].tolist() == ["REMOVE", "REMOVE", "KEEP"]
+
+
+def test_link_applies_block_policy():
+    records = _records()
+    dedup = ASRDedup(max_block_size=1, block_policy="skip")
+    df = dedup.link(records.iloc[[0, 2, 3]], records.iloc[[1, 4, 5]])
+
+    assert df["keep_remove"].tolist() == ["KEEP"] * 3
+    assert all(plan["n_pairs_after_policy"] == 0 for plan in dedup.block_plans)
+
+
+def test_link_rejects_cross_source_only():
+    records = _records()
+    with pytest.raises(ValueError):
+        ASRDedup(cross_source_only=True).link(records.iloc[:3], records.iloc[3:])
@@ -0,0 +1,66 @@
+import numpy as np
+from asreviewcontrib.preprocess.deduplication import grouping
+
+
+def _brute_force_groups(pair_rids, record_ids):
+    """Connected components of the records in pairs by graph search"""
+    neighbours = {rid: set() for rid in record_ids}
+    for rid1, rid2 in pair_rids:
+        if rid1 in neighbours and rid2 in neighbours:
+            neighbours[rid1].add(rid2)
+            neighbours[rid2].add(rid1)
+
+    groups, seen = set(), set()
+    for rid in record_ids:
+        if rid in seen or not neighbours[rid]:
+            continue
+        group, stack = set(), [rid]
+        while stack:
+            node = stack.pop()
+            if node not in group:
+                group.add(node)
+                stack.extend(neighbours[node] - group)
+        seen |= group
+        groups.add(tuple(sorted(group)))
+    return groups
+
+
+def _check_labels(pair_rids, record_ids):
+    labels = grouping.get_group_labels(pair_rids, record_ids)
+    groups = grouping.get_groups_from_labels(labels, record_ids)
+
+    assert set(groups) == _brute_force_groups(pair_rids, record_ids)
+    # Groups are labelled in order of their first record
+    first_labels = [label for label in labels if label > 0]
+    assert list(dict.fromkeys(first_labels)) == list(range(1, labels.max() + 1))
+
+
+def test_group_labels_match_brute_force():
+    rng = np.random.default_rng(0)
+    for n_records, n_pairs in [(50, 20), (200, 150), (500, 600), (30, 0)]:
+        record_ids = rng.permutation(np.arange(n_records) * 7 + 3)
+        pair_rids = rng.choice(record_ids, size=(n_pairs, 2))
+        _check_labels(pair_rids, record_ids)
+
+    # A long chain of pairs in random order is a single group
+    record_ids = rng.permutation(1000)
+    chain = np.stack([record_ids[:-1], record_ids[1:]], axis=1)
+    _check_labels(rng.permutation(chain), np.sort(record_ids))
+
+
+def test_pairs_bridging_groups():
+    record_ids = np.array([10, 11, 12, 13, 14, 15, 16])
+    pair_rids = np.array([[10, 11], [12, 13], [14, 15]])
+    labels = grouping.get_group_labels(pair_rids, record_ids)
+    assert labels.tolist() == [1, 1, 2, 2, 3, 3, 0]
+
+    # A pair of records of two groups merges the groups, also in a chain
+    pair_rids = np.concatenate([pair_rids, [[15, 12], [13, 11]]])
+    labels = grouping.get_group_labels(pair_rids, record_ids)
+    assert labels.tolist() == [1, 1, 1, 1, 1, 1, 0]
+    _check_labels(pair_rids, record_ids)
+
+
+def test_pairs_of_unknown_records_are_ignored():
+    labels = grouping.get_group_labels([[1, 2], [2, 99]], [1, 2, 3])
+    assert labels.tolist() == [1, 1, 0]
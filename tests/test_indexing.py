@@ -0,0 +1,155 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from asreviewcontrib.preprocess.deduplication import indexing
+
+
+def _brute_force_block_pairs(keys):
+    """All pairs of positions with equal non-missing keys"""
+    keys = list(keys)
+    return {
+        (j, i)
+        for i, j in combinations(range(len(keys)), 2)
+        if not pd.isna(keys[i]) and keys[i] == keys[j]
+    }
+
+
+def test_iter_block_pairs_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for n_records, n_keys, batch_size in [(200, 5, 7), (500, 40, 100), (50, 50, 3)]:
+        keys = pd.Series(rng.integers(0, n_keys, n_records).astype(str), dtype=object)
+        keys[rng.random(n_records) < 0.2] = np.nan
+        batches = list(indexing.iter_block_pairs(keys, batch_size=batch_size))
+        pairs = np.concatenate(batches) if batches else np.empty((0, 2), dtype=int)
+
+        # Batches of a block larger than batch_size hold at least one row
+        largest_row = int(keys.value_counts().max()) - 1
+        assert max(len(batch) for batch in batches) <= max(batch_size, largest_row)
+        assert len(set(map(tuple, pairs))) == len(pairs)
+        assert set(map(tuple, pairs)) == _brute_force_block_pairs(keys)
+
+
+def test_iter_block_pairs_without_blocks():
+    keys = pd.Series(["a", "b", np.nan, np.nan])
+    assert list(indexing.iter_block_pairs(keys)) == []
+
+
+def test_iter_link_block_pairs_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for n_records, n_left, n_keys, batch_size in [
+        (100, 40, 6, 7),
+        (300, 100, 30, 50),
+        (30, 30, 3, 5),
+        (50, 10, 50, 1),
+    ]:
+        keys = pd.Series(rng.integers(0, n_keys, n_records).astype(str), dtype=object)
+        keys[rng.random(n_records) < 0.2] = np.nan
+        batches = list(
+            indexing.iter_link_block_pairs(keys, n_left, batch_size=batch_size)
+        )
+        pairs = np.concatenate(batches) if batches else np.empty((0, 2), dtype=int)
+        expected = {
+            (right, left)
+            for right, left in _brute_force_block_pairs(keys)
+            if left < n_left <= right
+        }
+
+        assert all(len(batch) <= batch_size for batch in batches)
+        assert len(pairs) == len(expected)
+        assert set(map(tuple, pairs)) == expected
+        assert indexing.plan_blocks(keys, n_left=n_left)["n_pairs"] == len(expected)
+
+
+def _texts(n_records=300, n_identical=60, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["ALPHA", "BETA", "GAMMA", "DELTA", "EPSILON", "ZETA", "ETA", "THETA"]
+    texts = [" ".join(rng.choice(words, size=12)) for _ in range(n_records)]
+    # Near duplicates, a large bucket of identical texts and missing texts
+    texts += [text + " X" for text in texts[:50]]
+    texts += ["2001 EDITORIAL"] * n_identical
+    texts += [np.nan, ""] * 5
+    return pd.DataFrame({"text": texts}).rename_axis("record_id")
+
+
+def _brute_force_pairs(indexer, band_keys, signatures):
+    """All pairs sharing a key in any band, filtered on their signatures"""
+    pairs = set()
+    for band in band_keys:
+        keys = band_keys[band]
+        for key, members in keys.groupby(keys).indices.items():
+            pairs.update((j, i) for i, j in combinations(sorted(members), 2))
+    pairs = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+    return set(map(tuple, indexer._filter_pairs(pairs, signatures)))
+
+
+def test_minhash_iter_pairs_matches_brute_force():
+    df = _texts()
+    indexer = indexing.MinHashLSH(left_on="text", n_bands=8, n_rows=4)
+    band_keys, signatures = indexer.lsh_keys(df)
+
+    batches = list(
+        indexer.iter_pairs(
+            (band_keys[band] for band in band_keys), signatures, batch_size=100
+        )
+    )
+    pairs = np.concatenate(batches)
+
+    assert max(len(batch) for batch in batches) <= 100
+    assert len(set(map(tuple, pairs))) == len(pairs)
+    assert set(map(tuple, pairs)) == _brute_force_pairs(indexer, band_keys, signatures)
+
+
+def test_minhash_missing_texts_are_not_paired():
+    df = _texts()
+    indexer = indexing.MinHashLSH(left_on="text")
+    band_keys, _ = indexer.lsh_keys(df)
+
+    missing = df["text"].isna() | (df["text"] == "")
+    assert band_keys[missing.to_numpy()].isna().all().all()
+    assert band_keys[~missing.to_numpy()].notna().all().all()
+
+
+def test_minhash_index_matches_iter_pairs():
+    df = _texts()
+    indexer = indexing.MinHashLSH(left_on="text")
+    band_keys, signatures = indexer.lsh_keys(df)
+    pairs = np.concatenate(
+        list(indexer.iter_pairs((band_keys[band] for band in band_keys), signatures))
+    )
+
+    index = indexer.index(df)
+    expected = pd.MultiIndex.from_arrays([df.index[pairs[:, 0]], df.index[pairs[:, 1]]])
+    assert set(index) == set(expected)
+
+    # Linking only gives pairs of a record of each frame
+    df_a, df_b = df.iloc[:200], df.iloc[200:]
+    link_pairs = indexer.index(df_a, df_b)
+    assert link_pairs.get_level_values(0).isin(df_a.index).all()
+    assert link_pairs.get_level_values(1).isin(df_b.index).all()
+    assert set(link_pairs) == {
+        (min(i, j), max(i, j))
+        for i, j in index
+        if (min(i, j) < 200) and (max(i, j) >= 200)
+    }
+
+
+def test_minhash_oversized_buckets_are_skipped():
+    df = _texts(n_identical=60)
+    indexer = indexing.MinHashLSH(left_on="text", n_bands=8, n_rows=4)
+    band_keys, signatures = indexer.lsh_keys(df)
+
+    skipped_keys = []
+    for band in band_keys:
+        plan = indexing.plan_blocks(band_keys[band], max_block_size=20)
+        assert len(plan["oversized"])
+        skipped_keys.append(
+            indexing.apply_block_policy(
+                band_keys[band], plan["oversized"], "skip", max_block_size=20
+            )
+        )
+    pairs = np.concatenate(list(indexer.iter_pairs(skipped_keys, signatures)))
+
+    editorial = np.flatnonzero((df["text"] == "2001 EDITORIAL").to_numpy())
+    assert not np.isin(pairs, editorial).any()
+    assert len(pairs)
@@ -0,0 +1,132 @@
+import gzip
+import zipfile
+
+import pandas as pd
+import pytest
+from asreview.exceptions import BadFileFormatError
+from asreviewcontrib.preprocess.data.load import load_data, load_datasets, sniff_format
+from asreviewcontrib.preprocess.deduplication.methods.asr import ASRDedup
+
+
+def _write_dataset(path, n_records=3, upper=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(
+        {
+            "title": [f"Title {i}" for i in range(n_records)],
+            "abstract": [f"Abstract {i}" for i in range(n_records)],
+            "authors": [f"Smith, J.; Doe, {i}." for i in range(n_records)],
+            "year": [2000 + i for i in range(n_records)],
+            "journal": ["Nature"] * n_records,
+            "doi": [f"10.1000/{i}" for i in range(n_records)],
+        }
+    )
+    if upper:
+        df = df.rename(columns={"title": "Title", "abstract": "Abstract", "doi": "DOI"})
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_datasets_sources(tmp_path):
+    paths = [
+        _write_dataset(tmp_path / "a" / "data.csv", 3),
+        _write_dataset(tmp_path / "b" / "data.csv", 2),
+        _write_dataset(tmp_path / "c.csv", 1),
+    ]
+    df, _ = load_datasets(paths, n_jobs=1)
+
+    # Datasets with the same file name are labelled by their path
+    assert df["source"].cat.categories.tolist() == paths
+    assert df["source"].value_counts()[paths].tolist() == [3, 2, 1]
+    assert df.index.tolist() == list(range(6))
+
+
+def test_load_datasets_repeated_dataset(tmp_path):
+    path = _write_dataset(tmp_path / "data.csv")
+    (tmp_path / "a").mkdir()
+    same_path = str(tmp_path / "a" / ".." / "data.csv")
+    with pytest.raises(ValueError, match="only once"):
+        load_datasets([path, path], n_jobs=1)
+    with pytest.raises(ValueError, match="only once"):
+        load_datasets([path, same_path], n_jobs=1)
+
+
+def test_load_datasets_mixed_column_names(tmp_path):
+    paths = [
+        _write_dataset(tmp_path / "upper.csv", 2, upper=True),
+        _write_dataset(tmp_path / "lower.csv", 3),
+    ]
+    df, col_specs = load_datasets(paths, n_jobs=1)
+
+    assert not {"Title", "Abstract", "DOI"} & set(df.columns)
+    assert all(col_specs[col] == col for col in ["title", "abstract", "doi"])
+    assert df["title"].tolist() == [
+        "Title 0",
+        "Title 1",
+        "Title 0",
+        "Title 1",
+        "Title 2",
+    ]
+
+    # Records of both datasets with the same DOI and title are duplicates
+    groups = ASRDedup().dedup(df).sort_index()["duplicate_group_id"].to_numpy()
+    assert groups[0] == groups[2] > 0
+    assert groups[1] == groups[3] > 0
+    assert groups[4] == 0
+
+
+ENDNOTE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<xml><records>
+<record><rec-number>1</rec-number><titles><title><style>Title 0</style></title>
+</titles><dates><year><style>2000</style></year></dates></record>
+<record><rec-number>2</rec-number><titles><title><style>Title 1</style></title>
+</titles><dates><year><style>2001</style></year></dates></record>
+</records></xml>
+"""
+
+
+def test_load_gzip_dataset(tmp_path):
+    path = _write_dataset(tmp_path / "data.csv")
+    with open(path, "rb") as f, gzip.open(tmp_path / "data.csv.gz", "wb") as gz:
+        gz.write(f.read())
+
+    assert sniff_format(tmp_path / "data.csv.gz") == ("gzip", "data.csv", ".csv")
+    df, _ = load_data(str(tmp_path / "data.csv.gz"))
+    assert df["title"].tolist() == ["Title 0", "Title 1", "Title 2"]
+
+
+def test_load_zip_dataset(tmp_path):
+    path = _write_dataset(tmp_path / "data.csv")
+    with zipfile.ZipFile(tmp_path / "data.zip", "w") as archive:
+        archive.write(path, "export/data.csv")
+
+    assert sniff_format(tmp_path / "data.zip") == ("zip", "export/data.csv", ".csv")
+    df, _ = load_data(str(tmp_path / "data.zip"))
+    assert df["title"].tolist() == ["Title 0", "Title 1", "Title 2"]
+
+
+def test_load_zip_with_several_datasets(tmp_path):
+    path = _write_dataset(tmp_path / "data.csv")
+    with zipfile.ZipFile(tmp_path / "data.zip", "w") as archive:
+        archive.write(path, "a.csv")
+        archive.write(path, "b.csv")
+
+    with pytest.raises(BadFileFormatError):
+        load_data(str(tmp_path / "data.zip"))
+
+
+def test_xlsx_is_not_a_zip_file(tmp_path):
+    path = tmp_path / "data.xlsx"
+    pd.read_csv(_write_dataset(tmp_path / "data.csv")).to_excel(path, index=False)
+
+    assert sniff_format(path) == (None, "data.xlsx", ".xlsx")
+    df, _ = load_data(str(path))
+    assert df["title"].tolist() == ["Title 0", "Title 1", "Title 2"]
+
+
+def test_load_endnote_xml_as_txt(tmp_path):
+    path = tmp_path / "export.txt"
+    path.write_text(ENDNOTE_XML)
+
+    assert sniff_format(path) == (None, "export.txt", ".xml")
+    df, _ = load_data(str(path))
+    assert df["title"].tolist() == ["Title 0", "Title 1"]
@@ -0,0 +1,52 @@
+from asreviewcontrib.preprocess.io import xml_reader
+from asreviewcontrib.preprocess.io.xml_reader import EndnoteXMLReader
+
+
+def _record(i):
+    tag = "<record>" if i % 2 else f'<record\tid="{i}">'
+    return (
+        f"{tag}<rec-number>{i}</rec-number><titles><title><style>"
+        f"Title {i} about records</style></title></titles><dates><year><style>"
+        f"{2000 + i}</style></year></dates></record>\n"
+    )
+
+
+def _write_xml(path, n_records=50):
+    records = "".join(_record(i) for i in range(n_records))
+    path.write_text(
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<xml><records>\n{records}'
+        "</records></xml>\n"
+    )
+    return str(path)
+
+
+def test_find_record_start(tmp_path):
+    fp = _write_xml(tmp_path / "records.xml", 3)
+    content = (tmp_path / "records.xml").read_bytes()
+
+    with open(fp, "rb") as f:
+        # The <records> tag is skipped
+        first = xml_reader._find_record_start(f, 0)
+        assert first == content.index(b"<record\t")
+        second = xml_reader._find_record_start(f, first + 1)
+        assert second == content.index(b"<record>")
+        last = xml_reader._find_record_start(f, second + 1)
+        assert content[last:].startswith(b'<record\tid="2">')
+        assert xml_reader._find_record_start(f, last + 1) == -1
+
+
+def test_read_shards(tmp_path, monkeypatch):
+    fp = _write_xml(tmp_path / "records.xml")
+    expected = EndnoteXMLReader.read_data(fp)
+
+    shards = xml_reader._get_shards(fp, 7)
+    assert len(shards) == 7
+    columns = [[] for _ in xml_reader.COLUMNS]
+    for start, end in shards:
+        shard_columns = xml_reader._read_shard(fp, start, end)
+        for column, shard_column in zip(columns, shard_columns):
+            column.extend(shard_column)
+    assert columns[xml_reader.COLUMN_INDEX["title"]] == expected["title"].tolist()
+
+    monkeypatch.setattr(xml_reader, "MIN_SHARD_SIZE", 1024)
+    assert EndnoteXMLReader.read_data(fp, n_jobs=2).equals(expected)